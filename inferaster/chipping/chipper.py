@@ -4,6 +4,7 @@
 import rasterio
 import rasterio.features
 from rasterio.windows import Window
+from rasterio.enums import Resampling
 import numpy as np
 import pyproj
 from matplotlib import pyplot as plt
@@ -16,13 +17,41 @@ import argparse
 import inferaster.utils.geotiff as geotiff
 import inferaster.tiling.tilesets as tilesets
 from inferaster.utils.geo_shapes import WgsBBox, WgsPoint
-from shapely.geometry import Polygon
+from shapely.geometry import Polygon, box
+from shapely.prepared import prep
 import glob
 from inferaster.utils.geotiff import Geotiff
+from inferaster.utils.footprint_index import FootprintIndex
+from inferaster.utils.raster_cache import RasterCache, DEFAULT_RASTER_CACHE_DIR, DEFAULT_RASTER_CACHE_MAX_BYTES
 import geopandas
 import pandas as pd
 import json
 import rasterio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+
+
+# Set once in each chipping worker process by init_chip_worker, so the chipper and the
+# tiff dataframe are pickled once per worker rather than once per task
+_worker_chipper = None
+_worker_tiff_gdf = None
+
+def init_chip_worker(chipper, tiff_gdf):
+    global _worker_chipper, _worker_tiff_gdf
+    _worker_chipper = chipper
+    _worker_tiff_gdf = tiff_gdf
+
+def chip_tiff_task(tiff_pos:int) -> int:
+    return _worker_chipper.chip_one_tiff(_worker_tiff_gdf.iloc[tiff_pos])
+
+def chip_tiles_task(tile_chunk, stitch_mode:str) -> None:
+    _worker_chipper.save_tile_chunk(tile_chunk, _worker_tiff_gdf, stitch_mode)
+
+def describe_task(task_args, tiff_gdf) -> str:
+    if task_args[0] is chip_tiff_task:
+        return tiff_gdf.iloc[task_args[1]]["img_name"]
+    return "chunk of {} tiles".format(len(task_args[1]))
 
 
 class BaseChipper():
@@ -44,8 +73,20 @@ class BaseChipper():
         self.metadata_json = self.read_metadata_json()
         self.full_tiffs_path = os.path.join(self.datapath, self.full_tiff_dir)
         self.chips_path = self.get_chips_path()
+        self.rotate_mode = parsed_config.get("rotate_mode", "vrt")
+        # Optional resampling of every chip to a fixed size or ground sample distance
+        self.chip_out_size = parsed_config.get("chip_out_size", None)
+        self.chip_target_gsd_m = parsed_config.get("chip_target_gsd_m", None)
+        self.chip_resampling = Resampling[parsed_config.get("chip_resampling", "nearest")]
+        # None rounds each chip's corners on their own; "auto" or [height, width] gives chips one shape
+        self.chip_shape = parsed_config.get("chip_shape", None)
+        # Tiles estimated to be less valid than this are skipped before being read; 0 turns it off
+        self.chip_min_valid_frac = parsed_config.get("chip_min_valid_frac", 0.5)
+        self.raster_cache = RasterCache(
+            parsed_config.get("raster_cache_dir", DEFAULT_RASTER_CACHE_DIR),
+            int(parsed_config.get("raster_cache_max_gb", DEFAULT_RASTER_CACHE_MAX_BYTES / 1024**3) * 1024**3))
 
-    def chip(self, stitch_mode="no_stitch"):
+    def chip(self, stitch_mode="no_stitch", chunk_size=4096, use_cache=True, order="tile", workers=1):
         """
         Parameters
         ----------
@@ -53,51 +94,441 @@ class BaseChipper():
             how to fill in chips at image edges, by default "no_stitch".
             Options:
                 no_stitch - do nothing, tiffs will not be used unless they fully contain the chip
-                mosaic - unimplemented, stitch in information from same domain tiffs to fill the gap
+                mosaic - fill each tile from all the same domain tiffs that overlap it, newest first
+                    (see save_stack_mosaic)
+        chunk_size : int, optional
+            number of tiles matched against the tiff index at once, by default 4096
+        use_cache : bool, optional
+            if True (default), read tiff footprints from the on disk footprint index, only
+            reopening tiffs that are new or changed; if False, reopen every tiff.
+        order : str, optional
+            which loop is outermost, by default "tile".
+            Options:
+                tile - stream tiles, and pull each one from the tiffs that cover it
+                tiff - loop over source tiffs, opening each once and cutting every tile it
+                    fully contains; no_stitch only
+        workers : int, optional
+            number of worker processes, by default 1 (chip in this process). Work is split
+            by source tiff (order="tiff") or by tile chunk (order="tile"); each worker opens
+            its own tiffs and writes its own chips, so the output is the same as a serial run.
         """
-        # TODO speed this up somehow
-        # TODO full list to df vs building df 1 row at a time speed comparison
-        tile_list = self.tileset.get_tiles_from_wgs_bbox()
-        aoi_tiff_gdf = self.get_aoi_tiffs_gdf(self.full_tiffs_path, use_cache=False)
-        # TODO Should probably make tile dataframe and loop over tiffs instead...
-        
-        for each_tile in tile_list:
-            if stitch_mode == "no_stitch": 
-                self.save_stack_no_stitch(each_tile, aoi_tiff_gdf)
-            elif stitch_mode == "mosaic": 
-                self.save_stack_mosaic(each_tile, aoi_tiff_gdf)
-            else: 
-                raise NotImplementedError("Valid options for stitch modes are no_stitch, and mosaic")
-        
-        # TODO: See if there's a better way to do this
-        # TODO: Make this a generator
-        #for each_tile in tile_list:
-        #    pass
+        if stitch_mode not in ("no_stitch", "mosaic"):
+            raise NotImplementedError("Valid options for stitch modes are no_stitch, and mosaic")
+        if order not in ("tile", "tiff"):
+            raise NotImplementedError("Valid options for order are tile, and tiff")
+        if order == "tiff" and stitch_mode != "no_stitch":
+            raise NotImplementedError("tiff major chipping only supports the no_stitch stitch mode")
+        aoi_tiff_gdf = self.get_aoi_tiffs_gdf(self.full_tiffs_path, use_cache=use_cache)
+
+        if workers > 1:
+            self.chip_parallel(aoi_tiff_gdf, stitch_mode, chunk_size, order, workers)
+        elif order == "tiff":
+            for i, row in aoi_tiff_gdf.iterrows():
+                self.chip_one_tiff(row)
+        else:
+            # Tiles are streamed row by row, so memory stays flat no matter the AOI size
+            for tile_chunk in self.tileset.iter_tiles(chunk_size=chunk_size):
+                self.save_tile_chunk(tile_chunk, aoi_tiff_gdf, stitch_mode)
+
+    def save_tile_chunk(self, tile_chunk:tilesets.TileGrid, tiff_gdf:geopandas.GeoDataFrame, stitch_mode:str):
+        """
+        Tile major chipping of one chunk of tiles.
+
+        Parameters
+        ----------
+        tile_chunk : tilesets.TileGrid
+            tiles to chip
+        tiff_gdf : geopandas.GeoDataFrame
+            dataframe of all relevant geotiffs
+        stitch_mode : str
+            see chip
+        """
+        if stitch_mode == "no_stitch": 
+            candidates = self.get_tile_tiff_candidates(tile_chunk, tiff_gdf)
+            for tile_idx, tiff_idxs in candidates.items():
+                self.save_stack_no_stitch(tile_chunk[tile_idx], tiff_gdf.iloc[tiff_idxs])
+        elif stitch_mode == "mosaic": 
+            candidates = self.get_tile_tiff_candidates(tile_chunk, tiff_gdf, predicate="intersects")
+            for tile_idx, tiff_idxs in candidates.items():
+                self.save_stack_mosaic(tile_chunk[tile_idx], tiff_gdf.iloc[tiff_idxs])
+
+    def chip_parallel(self, tiff_gdf:geopandas.GeoDataFrame, stitch_mode:str, chunk_size:int, order:str, workers:int):
+        """
+        Runs chip() over a process pool. A task that fails is reported and skipped; chips
+        the other tasks wrote are kept. If a worker dies outright (e.g. killed for memory,
+        or a crash in GDAL) the pool breaks and every task in flight fails with it: the pool
+        is rebuilt, and those tasks are rerun one at a time first, so the one that killed
+        its worker is singled out and counted as failed while the rest still finish.
+
+        Parameters
+        ----------
+        tiff_gdf : geopandas.GeoDataFrame
+            dataframe of all relevant geotiffs
+        stitch_mode, chunk_size, order, workers
+            see chip
+        """
+        # spawn rather than fork, GDAL state doesn't survive a fork reliably
+        mp_context = multiprocessing.get_context("spawn")
+        if order == "tiff":
+            task_args = ((chip_tiff_task, tiff_pos) for tiff_pos in range(len(tiff_gdf)))
+        else:
+            task_args = ((chip_tiles_task, tile_chunk, stitch_mode)
+                         for tile_chunk in self.tileset.iter_tiles(chunk_size=chunk_size))
+        n_failed = 0
+        # tasks that were in flight when a worker died
+        suspects = []
+        broken = True
+        while broken:
+            broken = False
+            with ProcessPoolExecutor(max_workers=workers, mp_context=mp_context,
+                                     initializer=init_chip_worker, initargs=(self, tiff_gdf)) as executor:
+                while suspects and not broken:
+                    each_args = suspects.pop(0)
+                    future = executor.submit(*each_args)
+                    if isinstance(future.exception(), BrokenProcessPool):
+                        print("ERROR: chipping {} crashed its worker".format(describe_task(each_args, tiff_gdf)))
+                        n_failed += 1
+                        broken = True
+                    else:
+                        n_failed += self.count_failed([future])
+                if broken:
+                    continue
+                # Only keep a couple of tasks per worker in flight, so tile chunks are still streamed
+                pending = {}
+                for each_args in task_args:
+                    try:
+                        pending[executor.submit(*each_args)] = each_args
+                    except BrokenProcessPool:
+                        suspects.append(each_args)
+                        broken = True
+                    if len(pending) >= 2 * workers or broken:
+                        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                        n_failed += self.count_failed(done, pending, suspects)
+                        broken = broken or bool(suspects)
+                    if broken:
+                        break
+                wait(pending)
+                n_failed += self.count_failed(list(pending), pending, suspects)
+                broken = bool(suspects)
+        if n_failed > 0:
+            print("{} chipping task(s) failed; chips from all other tasks were saved.".format(n_failed))
+
+    @staticmethod
+    def count_failed(futures, pending:dict=None, suspects:list=None) -> int:
+        """
+        Reports and counts the failed futures among futures; with pending (future to task
+        args) and suspects given, the futures are removed from pending, and tasks lost to a
+        broken pool are added to suspects instead of counted.
+        """
+        n_failed = 0
+        for each_future in futures:
+            each_args = pending.pop(each_future) if pending is not None else None
+            err = each_future.exception()
+            if isinstance(err, BrokenProcessPool) and suspects is not None:
+                suspects.append(each_args)
+            elif err is not None:
+                print("ERROR: ", err)
+                n_failed += 1
+        return n_failed
+
+    def get_tile_tiff_candidates(self, tile_grid:tilesets.TileGrid, tiff_gdf:geopandas.GeoDataFrame,
+                                 predicate="covered_by") -> dict:
+        """
+        Matches a chunk of tiles against the tiff footprints in one bulk spatial index query,
+        instead of testing every tile against every tiff. The index (tiff_gdf.sindex) is built
+        once per dataframe and reused across chunks.
+
+        Parameters
+        ----------
+        tile_grid : tilesets.TileGrid
+            Tiles to match.
+        tiff_gdf : geopandas.GeoDataFrame
+            dataframe of all relevant geotiffs
+        predicate : str, optional
+            Relation each tile must have with a tiff footprint, by default "covered_by"
+            (i.e. the footprint covers the tile).
+
+        Returns
+        -------
+        dict
+            Sparse mapping of tile index (into tile_grid) to an array of positional row
+            indices into tiff_gdf; tiles with no candidate tiff are left out.
+        """
+        if len(tile_grid) == 0 or len(tiff_gdf) == 0:
+            return {}
+        tile_boxes = [box(w, s, e, n) for w, s, e, n in
+                      zip(tile_grid.west.tolist(), tile_grid.south.tolist(),
+                          tile_grid.east.tolist(), tile_grid.north.tolist())]
+        sindex = tiff_gdf.sindex
+        if hasattr(sindex, "query_bulk"):
+            tile_idxs, tiff_idxs = sindex.query_bulk(tile_boxes, predicate=predicate, sort=True)
+        else:
+            tile_idxs, tiff_idxs = sindex.query(tile_boxes, predicate=predicate, sort=True)
+        if "valid_footprint" in tiff_gdf.columns:
+            keep = self.get_valid_footprint_pairs(tile_boxes, tile_idxs, tiff_gdf, tiff_idxs, predicate)
+            tile_idxs, tiff_idxs = tile_idxs[keep], tiff_idxs[keep]
+        if len(tile_idxs) == 0:
+            return {}
+        # Results are sorted by tile, so each tile's tiffs are one contiguous run
+        split_at = np.flatnonzero(np.diff(tile_idxs)) + 1
+        return {int(each_tile[0]): each_tiffs for each_tile, each_tiffs in
+                zip(np.split(tile_idxs, split_at), np.split(tiff_idxs, split_at))}
     
-    def save_stack_no_stitch(self, tile:tilesets.Tile, tiff_gdf:geopandas.GeoDataFrame):
+    def get_valid_footprint_pairs(self, tile_boxes:list, tile_idxs:np.ndarray,
+                                  tiff_gdf:geopandas.GeoDataFrame, tiff_idxs:np.ndarray,
+                                  predicate="covered_by") -> np.ndarray:
+        """
+        For (tile, tiff) pairs the bounding box query matched, True where the tiff's valid
+        data footprint (from the footprint index) actually covers (predicate "covered_by") or
+        intersects (predicate "intersects") the tile; pairs that only land in a tiff's nodata
+        are dropped without opening it.
+
+        Returns
+        -------
+        np.ndarray
+            boolean mask over the pairs
+        """
+        keep = np.zeros(len(tile_idxs), dtype=bool)
+        footprint_col = tiff_gdf.columns.get_loc("valid_footprint")
+        for each_tiff in np.unique(tiff_idxs):
+            pair_idxs = np.flatnonzero(tiff_idxs == each_tiff)
+            prepared_footprint = prep(tiff_gdf.iat[int(each_tiff), footprint_col])
+            test = prepared_footprint.covers if predicate == "covered_by" else prepared_footprint.intersects
+            keep[pair_idxs] = [test(tile_boxes[tile_idx]) for tile_idx in tile_idxs[pair_idxs].tolist()]
+        return keep
+
+    def chip_one_tiff(self, tiff_row) -> int:
+        """
+        Tiff major version of save_stack_no_stitch: cuts every tile this tiff fully contains,
+        opening the tiff (and computing its footprint) only once.
+
+        Parameters
+        ----------
+        tiff_row : pandas.Series
+            one row of the tiff dataframe
+
+        Returns
+        -------
+        int
+            number of tiles the tiff fully contains
         """
+        if "valid_footprint" in tiff_row.index and tiff_row["valid_footprint"].is_empty:
+            # no valid pixels at all
+            return 0
+        # Only tiles in both the AOI and this tiff's bounding box can be contained
+        minx, miny, maxx, maxy = tiff_row.geometry.bounds
+        aoi = self.tileset.bounds
+        west, east = max(aoi.west, minx), min(aoi.east, maxx)
+        south, north = max(aoi.south, miny), min(aoi.north, maxy)
+        if west >= east or south >= north:
+            return 0
+        tile_grid = self.tileset.get_tile_grid(bounds=WgsBBox((west, north), (east, south)))
+        in_bbox = ((tile_grid.west >= minx) & (tile_grid.east <= maxx) &
+                   (tile_grid.south >= miny) & (tile_grid.north <= maxy))
+        if "valid_footprint" in tiff_row.index:
+            in_bbox = self.get_contained_tiles(tile_grid, tiff_row["valid_footprint"], in_bbox, covers=True)
+        if not in_bbox.any():
+            return 0
 
+        geo = Geotiff(tiff_row["full_path"])
+        try:
+            true_shape = self.get_exact_footprint(tiff_row, geo)
+            contained = self.get_contained_tiles(tile_grid, true_shape, in_bbox)
+            self.save_rio_chips(geo, tile_grid, np.flatnonzero(contained))
+        finally:
+            geo.close()
+        return int(contained.sum())
+
+    def get_exact_footprint(self, tiff_row, geo:Geotiff=None) -> Polygon:
+        """
+        The tiff's exact (find_exact) footprint, from the footprint index if the dataframe
+        came from it, otherwise computed from the open tiff.
+        """
+        if "exact_footprint" in tiff_row.index:
+            return tiff_row["exact_footprint"]
+        return Polygon(geo.find_exact())
+
+    def get_contained_tiles(self, tile_grid:tilesets.TileGrid, footprint:Polygon, mask:np.ndarray=None,
+                            covers:bool=False) -> np.ndarray:
+        """
+        Boolean mask of the tiles footprint fully contains.
 
         Parameters
         ----------
-        tile : tilesets.Tile
+        tile_grid : tilesets.TileGrid
+            tiles to test
+        footprint : Polygon
+            footprint to test against
+        mask : np.ndarray, optional
+            only these tiles are tested, the rest come back False; by default all tiles
+        covers : bool, optional
+            test covers (tiles may touch the footprint's edge) instead of contains, by default False
+
+        Returns
+        -------
+        np.ndarray
+            True where footprint contains the tile
+        """
+        if footprint.is_empty:
+            return np.zeros(len(tile_grid), dtype=bool)
+        minx, miny, maxx, maxy = footprint.bounds
+        # Cheap bounding box reject first, exact test only on what's left
+        contained = ((tile_grid.west >= minx) & (tile_grid.east <= maxx) &
+                     (tile_grid.south >= miny) & (tile_grid.north <= maxy))
+        if mask is not None:
+            contained &= mask
+        prepared_footprint = prep(footprint)
+        test = prepared_footprint.covers if covers else prepared_footprint.contains
+        for tile_idx in np.flatnonzero(contained):
+            tile_box = box(tile_grid.west[tile_idx], tile_grid.south[tile_idx],
+                           tile_grid.east[tile_idx], tile_grid.north[tile_idx])
+            contained[tile_idx] = test(tile_box)
+        return contained
+
+    def save_stack_no_stitch(self, tile:tilesets.TileRecord, tiff_gdf:geopandas.GeoDataFrame):
+        """
+
+
+        Parameters
+        ----------
+        tile : tilesets.TileRecord
             Tile bounding where to pull geotiff data from
         tiff_gdf : geopandas.GeoDataFrame
             dataframe of all relevant geotiffs
         """
-        coverage_tiff_gdf = tiff_gdf[tiff_gdf.covers(tile) == True]
+        coverage_tiff_gdf = tiff_gdf[tiff_gdf.covers(tile.polygon) == True]
         for i, row in coverage_tiff_gdf.iterrows():
             if len(coverage_tiff_gdf) <= 0:
                 break
+            if "exact_footprint" in row.index and not row["exact_footprint"].contains(tile.polygon):
+                continue
+            if "valid_footprint" in row.index and not row["valid_footprint"].covers(tile.polygon):
+                continue
             geo = Geotiff(row["full_path"])
-            true_shape = Polygon(geo.find_exact())
-            if true_shape.contains(tile):
-                self.save_rio_chip(geo, tile)
+            try:
+                true_shape = self.get_exact_footprint(row, geo)
+                if true_shape.contains(tile.polygon):
+                    self.save_rio_chip(geo, tile)
+            finally:
                 geo.close()
         print(coverage_tiff_gdf)
     
-    def save_stack_mosaic(self, tile, tiff_gdf):
-        raise NotImplementedError
+    def save_stack_mosaic(self, tile:tilesets.TileRecord, tiff_gdf:geopandas.GeoDataFrame):
+        """
+        Mosaics a tile from every group of same domain tiffs (see get_mosaic_groups) that
+        overlaps it, and saves one chip per group.
+
+        Parameters
+        ----------
+        tile : tilesets.TileRecord
+            Tile bounding where to pull geotiff data from
+        tiff_gdf : geopandas.GeoDataFrame
+            dataframe of the geotiffs that overlap the tile
+        """
+        for each_group in self.get_mosaic_groups(tiff_gdf):
+            self.save_mosaic_chip(tile, each_group)
+
+    def save_mosaic_chip(self, tile:tilesets.TileRecord, tiff_rows:list):
+        """
+        Fills one chip from tiff_rows in priority order. The first tiff sets the chip's
+        pixel grid (its north aligned window for the tile, as in no_stitch) and name; every
+        tiff is warped onto that grid, reading only the part of it that overlaps, and fills
+        only the pixels still empty in one preallocated buffer. Reading stops as soon as
+        every pixel is filled.
+
+        Parameters
+        ----------
+        tile : tilesets.TileRecord
+            Tile bounding where to pull geotiff data from
+        tiff_rows : list
+            tiff dataframe rows of one domain, highest priority first
+        """
+        bbox = [[tile.nw[0], tile.nw[1]],
+                    [tile.se[0], tile.se[1]]]
+        primary = Geotiff(tiff_rows[0]["full_path"])
+        try:
+            primary.open_rotated(self.rotate_mode, self.raster_cache)
+            col, row, width, height = primary.get_chip_windows([bbox], self.chip_shape)[0]
+            if width <= 0 or height <= 0:
+                return
+            window = Window(col, row, width, height)
+            chip_transform = primary.rotated_geo_reader.window_transform(window=window)
+            out_shape = primary.get_chip_out_shape(bbox, self.chip_out_size, self.chip_target_gsd_m)
+            chip_shape = out_shape if out_shape is not None else (int(height), int(width))
+            count = len(primary.get_data_bands())
+            chip = np.full((count,) + chip_shape, 255, dtype=primary.geo_reader.dtypes[0])
+            filled = np.zeros(chip_shape, dtype=bool)
+            for each_row in tiff_rows:
+                geo = primary if each_row["full_path"] == primary.geo_path else Geotiff(each_row["full_path"])
+                try:
+                    if len(geo.get_data_bands()) != count:
+                        continue
+                    data, valid = geo.read_into_frame(primary.src_crs, chip_transform, int(width), int(height),
+                                                      chip_shape, self.chip_resampling)
+                finally:
+                    if geo is not primary:
+                        geo.close()
+                new_pixels = valid & ~filled
+                chip[:, new_pixels] = data[:, new_pixels]
+                filled |= new_pixels
+                if filled.all():
+                    break
+            alpha_band = primary.get_alpha_band()
+            if alpha_band is not None:
+                # keep the primary's band layout, with its alpha rebuilt from the filled pixels
+                alpha = np.where(filled, 255, 0).astype(chip.dtype)
+                chip = np.insert(chip, alpha_band - 1, alpha, axis=0)
+            profile = primary.get_chip_profile(window, out_shape)
+            self.write_rio_chip(primary, tile, chip, profile)
+        finally:
+            primary.close()
+
+    def get_mosaic_groups(self, tiff_gdf:geopandas.GeoDataFrame) -> list:
+        """
+        Splits tiffs into same domain groups, each in mosaic priority order. Tiffs share a
+        domain if their metadata json collections have the same dataset and channels; they
+        are ordered newest date_collected first, undated last. Tiffs with no collection in
+        the metadata json are each their own group.
+
+        Parameters
+        ----------
+        tiff_gdf : geopandas.GeoDataFrame
+            dataframe of geotiffs
+
+        Returns
+        -------
+        list
+            lists of tiff dataframe rows, highest priority first
+        """
+        tiff_domains = self.get_tiff_domains()
+        groups = {}
+        for _, row in tiff_gdf.iterrows():
+            domain, date_collected = tiff_domains.get(row["img_name"], (("", row["img_name"]), None))
+            groups.setdefault(domain, []).append((date_collected, row))
+        # dates are parsed tz aware (see get_tiff_domains), so undated tiffs sort last on a tz aware minimum
+        undated = pd.Timestamp.min.tz_localize("UTC")
+        mosaic_groups = []
+        for each_domain in sorted(groups.keys()):
+            dated = sorted(groups[each_domain], key=lambda each: each[1]["img_name"])
+            dated = sorted(dated, key=lambda each: undated if pd.isnull(each[0]) else each[0], reverse=True)
+            mosaic_groups.append([row for _, row in dated])
+        return mosaic_groups
+
+    def get_tiff_domains(self) -> dict:
+        """
+        Maps each tiff name in the metadata json to its domain, (dataset, channels), and its
+        date_collected; cached after the first call.
+        """
+        if getattr(self, "_tiff_domains", None) is None:
+            self._tiff_domains = {}
+            for each_col in self.metadata_json.get("collections", {}).values():
+                required_metadata = each_col.get("required_metadata", {})
+                img_name = os.path.basename(each_col.get("relpath", "")) or each_col.get("name", "") + ".tiff"
+                domain = (str(required_metadata.get("dataset", "")),
+                          json.dumps(required_metadata.get("channels", {}), sort_keys=True))
+                date_collected = pd.to_datetime(required_metadata.get("date_collected"), errors="coerce", utc=True)
+                self._tiff_domains[img_name] = (domain, date_collected)
+        return self._tiff_domains
 
     def get_chips_path(self) -> str:
         """
@@ -119,11 +550,48 @@ class BaseChipper():
         return os.path.join(prefix, postfix)        
 
     
-    def cache_tiff_gdf(self):
-        raise NotImplementedError
+    def get_footprint_index_path(self) -> str:
+        return os.path.join(self.datapath, "footprint_index.json")
 
-    def load_cached_gdf(self):
-        raise NotImplementedError
+    def cache_tiff_gdf(self, tiff_path=None) -> FootprintIndex:
+        """
+        Brings the on disk footprint index (next to metadata.json) up to date with the
+        tiffs in tiff_path. Only new or changed tiffs are opened.
+
+        Parameters
+        ----------
+        tiff_path : str, optional
+            folder of tiffs to index, by default the full tiff folder
+
+        Returns
+        -------
+        FootprintIndex
+            the updated index
+        """
+        if tiff_path is None:
+            tiff_path = self.full_tiffs_path
+        footprint_index = FootprintIndex(self.get_footprint_index_path())
+        full_tiff_list = glob.glob(tiff_path + "/*.tiff")
+        if footprint_index.update(full_tiff_list):
+            footprint_index.save()
+        return footprint_index
+
+    def load_cached_gdf(self, tiff_path=None) -> geopandas.GeoDataFrame:
+        """
+        Same dataframe as get_all_tiffs_gdf, read from the footprint index, which is
+        incrementally updated first.
+
+        Parameters
+        ----------
+        tiff_path : str, optional
+            folder of tiffs, by default the full tiff folder
+
+        Returns
+        -------
+        geopandas.GeoDataFrame
+            img_name, full_path, src_crs, exact_footprint and WGS84 bounds of every tiff
+        """
+        return self.cache_tiff_gdf(tiff_path).to_gdf()
     
     def read_metadata_json(self):
         metadata_path = os.path.join(self.datapath, "metadata.json")
@@ -133,7 +601,7 @@ class BaseChipper():
 
     def get_aoi_tiffs_gdf(self, tiff_path, use_cache=False):
         if use_cache == True:
-            all_tiff_gdf = self.load_cached_gdf()
+            all_tiff_gdf = self.load_cached_gdf(tiff_path)
         else:
             all_tiff_gdf = self.get_all_tiffs_gdf(tiff_path)
         aoi_tiff_gdf = all_tiff_gdf[all_tiff_gdf.intersects(self.tileset.bounds) == True]
@@ -156,10 +624,69 @@ class BaseChipper():
         all_tiff_gdf = geopandas.GeoDataFrame(df, geometry=tiff_bboxes)
         return all_tiff_gdf
     
-    def save_rio_chip(self, geotiff:Geotiff, tile:tilesets.Tile):
+    def save_rio_chip(self, geotiff:Geotiff, tile:tilesets.TileRecord):
         bbox = [[tile.nw[0], tile.nw[1]],
                     [tile.se[0], tile.se[1]]]
-        chip, profile = geotiff.wgs84_bbox_to_rio_chip(bbox)
+        if not self.get_valid_chips(geotiff, [bbox])[0]:
+            print("array is mostly nodata")
+            return
+        chip, profile = geotiff.wgs84_bbox_to_rio_chip(bbox, rotate_mode=self.rotate_mode,
+                                                       raster_cache=self.raster_cache,
+                                                       out_size=self.chip_out_size,
+                                                       target_gsd_m=self.chip_target_gsd_m,
+                                                       resampling=self.chip_resampling,
+                                                       chip_shape=self.chip_shape)
+        self.write_rio_chip(geotiff, tile, chip, profile)
+
+    def save_rio_chips(self, geotiff:Geotiff, tile_grid:tilesets.TileGrid, tile_idxs:np.ndarray):
+        """
+        save_rio_chip for many tiles of one tiff, read through the coalesced
+        Geotiff.wgs84_bboxes_to_rio_chips.
+
+        Parameters
+        ----------
+        geotiff : Geotiff
+            open tiff to cut the chips from
+        tile_grid : tilesets.TileGrid
+            tiles
+        tile_idxs : np.ndarray
+            positions in tile_grid of the tiles to save
+        """
+        tile_bounds = tile_grid.bounds[tile_idxs]
+        bboxes = tile_bounds.reshape(-1, 2, 2)
+        valid = self.get_valid_chips(geotiff, bboxes)
+        tile_idxs, bboxes = tile_idxs[valid], bboxes[valid]
+        for each_idx, chip, profile in geotiff.wgs84_bboxes_to_rio_chips(
+                bboxes, rotate_mode=self.rotate_mode, raster_cache=self.raster_cache,
+                out_size=self.chip_out_size, target_gsd_m=self.chip_target_gsd_m,
+                resampling=self.chip_resampling, chip_shape=self.chip_shape):
+            self.write_rio_chip(geotiff, tile_grid[tile_idxs[each_idx]], chip, profile)
+
+    def get_valid_chips(self, geotiff:Geotiff, bboxes) -> np.ndarray:
+        """
+        Prefilter run before chips are read: False for the bboxes Geotiff.estimate_valid_fraction
+        puts under chip_min_valid_frac.
+
+        Parameters
+        ----------
+        geotiff : Geotiff
+            open tiff the chips would be cut from
+        bboxes : array_like
+            N bboxes, each [[west, north], [east, south]] in WGS84 degrees
+
+        Returns
+        -------
+        np.ndarray
+            N booleans, True to read the chip
+        """
+        if not self.chip_min_valid_frac:
+            return np.ones(len(bboxes), dtype=bool)
+        valid_frac = geotiff.estimate_valid_fraction(bboxes, rotate_mode=self.rotate_mode,
+                                                     raster_cache=self.raster_cache,
+                                                     chip_shape=self.chip_shape)
+        return valid_frac >= self.chip_min_valid_frac
+
+    def write_rio_chip(self, geotiff:Geotiff, tile:tilesets.TileRecord, chip:np.ndarray, profile:dict):
         tile_dir = "{:3.6f}_{:3.6f}".format(tile.nw.lon, tile.nw.lat)
         name = geotiff.geo_reader.name.split(os.path.sep)[-1] #geotiff.read_tags()["name"].strip("\"") + ".tiff"
         tile_path = os.path.join(self.chips_path, tile_dir)
@@ -168,8 +695,8 @@ class BaseChipper():
             if (chip == 255).sum() > 150:
                 print("array is all zeros")
                 return
-            if not os.path.exists(tile_path):
-                os.makedirs(tile_path)
+            # exist_ok, other chipping workers may be making the same tile folder
+            os.makedirs(tile_path, exist_ok=True)
             with rasterio.open(chip_path, 'w', **profile) as dst:
                 dst.write(chip)
         else:
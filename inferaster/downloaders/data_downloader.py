@@ -1,11 +1,12 @@
 import abc
+import glob
 import json
 import os
 import requests
 from typing import List
 
 from inferaster.utils.geo_shapes import WgsBBox, WgsPoint, GeoPoint, GeoBBox
-from inferaster.utils.geotiff import Geotiff
+from inferaster.utils.geotiff import Geotiff, is_cog_layout, write_cog, write_sidecar
 
 
 class Entry():
@@ -104,6 +105,7 @@ class DataDownloader(metaclass=abc.ABCMeta):
         self.datapath = parsed_config["datapath"]
         self.full_tiff_dir = parsed_config["full_tiff_dir"]
         self.metadata_json = self.read_metadata_json()
+        self.metadata_mode = parsed_config.get("metadata_mode", "tags")
 
     @abc.abstractmethod
     def get_image_data_list(self, max_items:int) -> List[Entry]:
@@ -179,6 +181,8 @@ class DataDownloader(metaclass=abc.ABCMeta):
                 print("ERROR: ", e)
                 continue
         self.data_process()
+        if self.config.get("cog_normalize", False):
+            self.normalize_tiffs(compress=self.config.get("cog_compress", "deflate"))
         self.save_updated_metadata_json()
 
     def data_process(self):
@@ -187,6 +191,32 @@ class DataDownloader(metaclass=abc.ABCMeta):
         """
         print("data_process function not overwritten in child class; no preprocessing done.")
 
+    def normalize_tiffs(self, compress="deflate"):
+        """
+        Rewrites every tiff in the tiffs to chip folder that isn't already tiled, compressed and
+        overviewed (see utils/geotiff.write_cog), so the chipper's windowed reads stay cheap.
+        Turned on after download with the cog_normalize config key.
+
+        Parameters
+        ----------
+        compress : str, optional
+            GDAL compression to use, by default "deflate"
+        """
+        full_tiffs_path = os.path.join(self.datapath, self.full_tiff_dir)
+        for each_tiff in sorted(glob.glob(full_tiffs_path + "/*.tiff")):
+            tmp_path = "{}.{}.tmp".format(each_tiff, os.getpid())
+            try:
+                if is_cog_layout(each_tiff):
+                    continue
+                write_cog(each_tiff, tmp_path, compress=compress)
+                os.replace(tmp_path, each_tiff)
+                print("normalized {}".format(each_tiff))
+            except Exception as e:
+                print("ERROR: ", e)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
     def login(self):
         """
         Overrideable function to do a login, if needed by the target API.
@@ -251,6 +281,31 @@ class DataDownloader(metaclass=abc.ABCMeta):
 
         full_path = self.get_tiff_path(entry.uid, entry.name)
 
-        gtiff = Geotiff(full_path)
-        gtiff.write_tags(col_update)
-        gtiff.close()
+        self.write_tiff_metadata(full_path, col_update)
+
+    def write_tiff_metadata(self, full_path:str, col_update:dict) -> None:
+        """
+        Stores a tiff's collection metadata where the metadata_mode config key says:
+            tags - (default) JSON encode all of it into the tiff's tags
+            sidecar - write it to a JSON sidecar next to the tiff (utils/geotiff.write_sidecar); the tiff isn't touched
+            sidecar_uid - sidecar, plus just the collection uid as a tiff tag
+
+        Parameters
+        ----------
+        full_path : str
+            Path of the tiff
+        col_update : dict
+            Collection metadata for it, as put in the metadata json
+        """
+        if self.metadata_mode == "tags":
+            gtiff = Geotiff(full_path, mode='r+')
+            gtiff.write_tags(col_update)
+            gtiff.close()
+        elif self.metadata_mode in ("sidecar", "sidecar_uid"):
+            write_sidecar(full_path, col_update)
+            if self.metadata_mode == "sidecar_uid":
+                gtiff = Geotiff(full_path, mode='r+')
+                gtiff.write_tags({"uid": col_update["uid"]})
+                gtiff.close()
+        else:
+            raise NotImplementedError("Valid options for metadata_mode are tags, sidecar, and sidecar_uid")
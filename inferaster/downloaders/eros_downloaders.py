@@ -13,7 +13,6 @@ import zipfile, os
 import yaml
 import rasterio
 import copy
-from inferaster.utils.geotiff import Geotiff
 
 
 from inferaster.downloaders.data_downloader import DataDownloader, Entry
@@ -692,12 +691,8 @@ class ErosDownloader(DataDownloader):
         full_path_rgb = self.get_tiff_path(entry.uid, col_update_rgb["name"])
         full_path_ir = self.get_tiff_path(entry.uid, col_update_ir["name"])
 
-        gtiff_rgb = Geotiff(full_path_rgb)
-        gtiff_ir = Geotiff(full_path_ir)
-        gtiff_rgb.write_tags(col_update_rgb)
-        gtiff_ir.write_tags(col_update_ir)
-        gtiff_rgb.close()
-        gtiff_ir.close()
+        self.write_tiff_metadata(full_path_rgb, col_update_rgb)
+        self.write_tiff_metadata(full_path_ir, col_update_ir)
 
 
 class ErosHyperionDownloader(DataDownloader):
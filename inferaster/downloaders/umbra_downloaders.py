@@ -6,13 +6,10 @@ import json
 import datetime
 from inferaster.downloaders.data_downloader import DataDownloader, Entry
 from zipfile import ZipFile
-from inferaster.utils.geotiff import Geotiff
-import rasterio
+from inferaster.utils.geotiff import Geotiff, rotate_raster, ROTATE_WARP_MEM_LIMIT
 
 from geopy.distance import geodesic
 
-from rasterio.warp import reproject, Resampling
-from affine import Affine
 import numpy as np
 
 import math
@@ -43,6 +40,8 @@ class UmbraZipDownloader(DataDownloader):
         self.bbox = self.bounding_box
         self.datapath = parsed_config["datapath"]
         self.tiff_dir = parsed_config["full_tiff_dir"]
+        self.rotate_threads = parsed_config.get("rotate_threads", 1)
+        self.rotate_warp_mem_limit = parsed_config.get("rotate_warp_mem_limit", ROTATE_WARP_MEM_LIMIT)
     
     def convert_search_results_to_json(self):
         raise NotImplementedError
@@ -253,52 +252,9 @@ class UmbraZipDownloader(DataDownloader):
         
 
     def rotate_raster(self, in_file,out_file, angle, shift_x=0, shift_y=0,adj_width=0, adj_height=0):
-
-
-        with rasterio.open(in_file) as src:
-
-            # Get the old transform and crs
-            src_transform = src.transform 
-            crs = src.crs
-
-            # Affine transformations for rotation and translation
-            rotate = Affine.rotation(angle)
-            trans_x = Affine.translation(shift_x,0)
-            trans_y = Affine.translation(0, -shift_y)
-
-            # Combine affine transformations
-            dst_transform = src_transform * rotate * trans_x * trans_y
-
-            # Get band data
-            band = np.array(src.read(1))
-
-            # Get the new shape
-            y,x = band.shape
-            dst_height = y + adj_height
-            dst_width = x + adj_width
-
-            # set properties for output
-            dst_kwargs = src.meta.copy()
-            dst_kwargs.update(
-                {
-                    "transform": dst_transform,
-                    "height": dst_height,
-                    "width": dst_width,
-                    "nodata": 255,
-                }
-            )
-
-            # write to disk
-            with rasterio.open(out_file, "w", **dst_kwargs) as dst:
-                # reproject to new CRS
-
-                reproject(source=band,
-                            destination=rasterio.band(dst, 1),
-                            src_transform=src_transform,
-                            src_crs=crs,
-                            dst_transform=dst_transform,
-                            dst_crs=crs,
-                            resampling=Resampling.nearest)
+        rotate_raster(in_file, out_file, angle, shift_x=shift_x, shift_y=shift_y,
+                      adj_width=adj_width, adj_height=adj_height,
+                      warp_mem_limit=self.rotate_warp_mem_limit, num_threads=self.rotate_threads)
 
 
 
@@ -88,4 +88,4 @@ if __name__ == "__main__":
         #tset = parsed_config["tiling_method"]
         #datapath = parsed_config["datapath"]
         chipper = BaseChipper(parsed_config)
-        chipper.chip()
+        chipper.chip(workers=parsed_config.get("chip_workers", 1))
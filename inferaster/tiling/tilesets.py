@@ -1,14 +1,16 @@
 #import Tiles
 #from Tiles import Tile
 from typing import Tuple, List
+from functools import lru_cache
 import numpy as np
 import abc
-from geopy.distance import geodesic
 import geopandas as geopd
 import matplotlib.pyplot as plt
 
 from inferaster.utils.great_circles import move_along_meridian, move_along_parallel
-from inferaster.utils.geo_shapes import WgsBBox, WgsPoint, GeoPoint, GeoBBox
+from inferaster.utils.great_circles import m_per_deg_along_parallel, WGS84_GEOD
+from inferaster.utils.geo_shapes import WgsBBox, WgsPoint, GeoPoint, GeoBBox, format_latlon
+from shapely.geometry import Polygon, box
 
 """
 class OsmTile(WgsBBox):
@@ -139,11 +141,12 @@ class TileBBox(GeoBBox):
 """
 
 class Tile(WgsBBox):
-    def __init__(self, id:TileID, parent_tileset) -> None:
+    def __init__(self, id:TileID, parent_tileset, bounds:WgsBBox=None) -> None:
         if(type(id) == tuple):
             id = TileID(id[0], id[1])
         assert(type(id.x) == int and type(id.y) == int)
-        bounds = parent_tileset.get_wgs_box_by_id(id)
+        if bounds is None:
+            bounds = parent_tileset.get_wgs_box_by_id(id)
         super().__init__(bounds.nw, bounds.se)
         self.id = id
         self.parent_tileset = parent_tileset
@@ -156,6 +159,169 @@ class Tile(WgsBBox):
     def y(self):
         return self.id.y
 
+    def __reduce__(self):
+        bounds = WgsBBox((self.west, self.north), (self.east, self.south))
+        return (self.__class__, ((self.x, self.y), self.parent_tileset, bounds))
+
+
+class TileRecord():
+    """
+    Lightweight stand in for Tile: just the ids and the four WGS84 bounds.
+    Unlike Tile it is not a shapely Polygon, so building millions of them is
+    cheap; the shapely polygon and geopy/shapely corner points are only built
+    (and then kept) when first asked for.
+    """
+    __slots__ = ("x", "y", "north", "west", "south", "east", "parent_tileset",
+                 "_polygon", "_nw", "_se")
+
+    def __init__(self, x:int, y:int, north:float, west:float, south:float, east:float,
+                 parent_tileset=None) -> None:
+        self.x = x
+        self.y = y
+        self.north = north
+        self.west = west
+        self.south = south
+        self.east = east
+        self.parent_tileset = parent_tileset
+        self._polygon = None
+        self._nw = None
+        self._se = None
+
+    @property
+    def id(self) -> TileID:
+        return TileID(self.x, self.y)
+
+    @property
+    def polygon(self) -> Polygon:
+        if self._polygon is None:
+            self._polygon = box(minx=self.west, maxy=self.north, maxx=self.east, miny=self.south)
+        return self._polygon
+
+    @property
+    def nw(self) -> WgsPoint:
+        if self._nw is None:
+            self._nw = WgsPoint(self.west, self.north)
+        return self._nw
+
+    @property
+    def se(self) -> WgsPoint:
+        if self._se is None:
+            self._se = WgsPoint(self.east, self.south)
+        return self._se
+
+    @property
+    def ne(self) -> WgsPoint:
+        return WgsPoint(self.east, self.north)
+
+    @property
+    def sw(self) -> WgsPoint:
+        return WgsPoint(self.west, self.south)
+
+    @property
+    def geo_bounds(self):
+        return {"west": self.west, "north": self.north,
+                "east": self.east, "south": self.south, }
+
+    def to_tile(self) -> Tile:
+        """
+        Builds the full shapely backed Tile for this record.
+        """
+        bounds = WgsBBox((self.west, self.north), (self.east, self.south))
+        return Tile(self.id, self.parent_tileset, bounds=bounds)
+
+    def __str__(self):
+        s = "TileRecord("
+        for (k,v) in self.geo_bounds.items():
+            s += "{}: {} ".format(k, format_latlon(v))
+        return s + ')'
+
+    def __repr__(self):
+        return self.__str__()
+
+
+class TileGrid():
+    """
+    Array backed view of a set of tiles. Holds the x/y tile ids and the
+    north/west/south/east bounds (in WGS84 degrees) of every tile as flat
+    numpy arrays, so a whole AOI can be enumerated without building a
+    shapely object per tile. Tile objects are only built on demand by index.
+    """
+    def __init__(self, x:np.ndarray, y:np.ndarray, north:np.ndarray, west:np.ndarray,
+                 south:np.ndarray, east:np.ndarray, parent_tileset) -> None:
+        """
+
+        Parameters
+        ----------
+        x, y : np.ndarray
+            Integer tile ids, one entry per tile.
+        north, west, south, east : np.ndarray
+            Tile bounds in WGS84 degrees, aligned with x and y.
+        parent_tileset : Tileset
+            Tileset the ids belong to.
+        """
+        self.x = np.asarray(x, dtype=np.int64)
+        self.y = np.asarray(y, dtype=np.int64)
+        self.north = np.asarray(north, dtype=np.float64)
+        self.west = np.asarray(west, dtype=np.float64)
+        self.south = np.asarray(south, dtype=np.float64)
+        self.east = np.asarray(east, dtype=np.float64)
+        self.parent_tileset = parent_tileset
+
+    def __len__(self) -> int:
+        return len(self.x)
+
+    def __getitem__(self, idx):
+        # Slices stay array backed; integer indices build a TileRecord
+        if isinstance(idx, slice):
+            return TileGrid(self.x[idx], self.y[idx], self.north[idx], self.west[idx],
+                            self.south[idx], self.east[idx], self.parent_tileset)
+        return self.get_tile(idx)
+
+    def __iter__(self):
+        # tolist() once is much cheaper than pulling numpy scalars out one at a time
+        columns = zip(self.x.tolist(), self.y.tolist(), self.north.tolist(), self.west.tolist(),
+                      self.south.tolist(), self.east.tolist())
+        for x, y, north, west, south, east in columns:
+            yield TileRecord(x, y, north, west, south, east, self.parent_tileset)
+
+    def get_tile(self, idx:int) -> TileRecord:
+        """
+        Builds the tile record for one entry of the grid.
+
+        Parameters
+        ----------
+        idx : int
+            Index into the grid arrays.
+
+        Returns
+        -------
+        TileRecord
+            Tile at that index, reusing the precomputed bounds. Use .to_tile() if
+            the full shapely backed Tile is needed.
+        """
+        return TileRecord(int(self.x[idx]), int(self.y[idx]), float(self.north[idx]), float(self.west[idx]),
+                          float(self.south[idx]), float(self.east[idx]), self.parent_tileset)
+
+    @property
+    def bounds(self) -> np.ndarray:
+        """
+        Nx4 array of [west, north, east, south] per tile.
+        """
+        return np.stack([self.west, self.north, self.east, self.south], axis=1)
+
+    @classmethod
+    def concatenate(cls, grids:List["TileGrid"]) -> "TileGrid":
+        """
+        Joins grids from the same tileset end to end.
+        """
+        return cls(np.concatenate([each_grid.x for each_grid in grids]),
+                   np.concatenate([each_grid.y for each_grid in grids]),
+                   np.concatenate([each_grid.north for each_grid in grids]),
+                   np.concatenate([each_grid.west for each_grid in grids]),
+                   np.concatenate([each_grid.south for each_grid in grids]),
+                   np.concatenate([each_grid.east for each_grid in grids]),
+                   grids[0].parent_tileset)
+
 
 class Tileset(abc.ABC):
     def __init__(self, bounds: WgsBBox) -> None:#, zoom: int) -> None:
@@ -173,24 +339,139 @@ class Tileset(abc.ABC):
     def get_wgs_box_by_id(self, id:TileID) -> WgsBBox:
         pass
 
-    # TODO this should really probably be a generator instead of a list
-    # TODO Or maybe this should be a geopandas df
-    def get_tiles_from_wgs_bbox(self) -> List[Tile]:
-        tile_list = []
-        tile_bound_north = self.get_y_by_lat(self.bounds.north)
-        tile_bound_south = self.get_y_by_lat(self.bounds.south)
-        for y in range(tile_bound_north, tile_bound_south - 1, -1):
-            # TODO: refactor this
-            pm_tile = Tile(TileID(0, y), self)
-            curr_lat = pm_tile.north
-            tile_bound_west = self.get_x_by_lon_lat(self.bounds.west, curr_lat)
-            tile_bound_east = self.get_x_by_lon_lat(self.bounds.east, curr_lat)
-            for x in range(tile_bound_west, tile_bound_east + 1):
-                #tile_id = GeoPoint(x,y)
-                id = TileID(x, y)
-                new_tile = Tile(id, self)
-                tile_list.append(new_tile)
-        return tile_list
+    # Batched versions of the id/bounds lookups. These fall back to looping over the
+    # scalar methods; subclasses should override them with real vectorized math.
+    def get_x_by_lon_lat_batch(self, lon_deg, lat_deg) -> np.ndarray:
+        lon_deg, lat_deg = np.broadcast_arrays(np.asarray(lon_deg, dtype=np.float64),
+                                               np.asarray(lat_deg, dtype=np.float64))
+        ids = [self.get_x_by_lon_lat(lon, lat) for lon, lat in zip(lon_deg.ravel(), lat_deg.ravel())]
+        return np.array(ids, dtype=np.int64).reshape(lon_deg.shape)
+
+    def get_y_by_lat_batch(self, lat_deg) -> np.ndarray:
+        lat_deg = np.asarray(lat_deg, dtype=np.float64)
+        ids = [self.get_y_by_lat(lat) for lat in lat_deg.ravel()]
+        return np.array(ids, dtype=np.int64).reshape(lat_deg.shape)
+
+    def get_wgs_box_by_id_batch(self, x, y) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Array version of get_wgs_box_by_id.
+
+        Parameters
+        ----------
+        x, y : array_like
+            Integer tile ids; broadcast against each other.
+
+        Returns
+        -------
+        Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+            north, west, south, east bounds in WGS84 degrees.
+        """
+        x, y = np.broadcast_arrays(np.asarray(x, dtype=np.int64), np.asarray(y, dtype=np.int64))
+        bounds = np.empty((4,) + x.shape, dtype=np.float64)
+        for idx, (id_x, id_y) in enumerate(zip(x.ravel(), y.ravel())):
+            bbox = self.get_wgs_box_by_id(TileID(int(id_x), int(id_y)))
+            bounds.reshape(4, -1)[:, idx] = (bbox.north, bbox.west, bbox.south, bbox.east)
+        return bounds[0], bounds[1], bounds[2], bounds[3]
+
+    def get_row_ids(self, bounds:WgsBBox=None) -> np.ndarray:
+        """
+        Tile row (y) ids covering the bounds, ordered from north to south.
+        bounds defaults to the tileset's bounds.
+        """
+        if bounds is None:
+            bounds = self.bounds
+        tile_bound_north = self.get_y_by_lat(bounds.north)
+        tile_bound_south = self.get_y_by_lat(bounds.south)
+        return np.arange(tile_bound_north, tile_bound_south - 1, -1, dtype=np.int64)
+
+    def get_tile_grid(self, bounds:WgsBBox=None) -> TileGrid:
+        """
+        Enumerates every tile in the bounds in one vectorized pass, in the same
+        row major, north to south / west to east order as get_tiles_from_wgs_bbox.
+
+        Parameters
+        ----------
+        bounds : WgsBBox, optional
+            Area to enumerate instead of the tileset's bounds (e.g. one tiff's
+            footprint); ids are the same as in the full tileset.
+
+        Returns
+        -------
+        TileGrid
+            Ids and bounds of all the tiles as numpy arrays.
+        """
+        return self.get_tile_grid_for_rows(self.get_row_ids(bounds), bounds)
+
+    def get_tile_grid_for_rows(self, row_ys:np.ndarray, bounds:WgsBBox=None) -> TileGrid:
+        """
+        Enumerates the tiles of the given rows that fall in the bounds.
+
+        Parameters
+        ----------
+        row_ys : np.ndarray
+            Row ids, as returned by get_row_ids.
+        bounds : WgsBBox, optional
+            Area to enumerate, by default the tileset's bounds.
+
+        Returns
+        -------
+        TileGrid
+            Ids and bounds of the tiles in those rows.
+        """
+        if bounds is None:
+            bounds = self.bounds
+        row_ys = np.asarray(row_ys, dtype=np.int64)
+        # The x range of a row is taken at the latitude of its northern edge
+        row_north, _, _, _ = self.get_wgs_box_by_id_batch(np.zeros_like(row_ys), row_ys)
+        row_west = self.get_x_by_lon_lat_batch(bounds.west, row_north)
+        row_east = self.get_x_by_lon_lat_batch(bounds.east, row_north)
+        row_counts = np.maximum(row_east - row_west + 1, 0)
+
+        y = np.repeat(row_ys, row_counts)
+        # x restarts at each row's western id
+        row_starts = np.cumsum(row_counts) - row_counts
+        x = np.arange(len(y), dtype=np.int64) - np.repeat(row_starts - row_west, row_counts)
+        north, west, south, east = self.get_wgs_box_by_id_batch(x, y)
+        return TileGrid(x, y, north, west, south, east, self)
+
+    def iter_tiles(self, chunk_size:int=None):
+        """
+        Lazily walks the tiles in the bounds one row at a time, so only a row's
+        worth of tiles is ever held in memory.
+
+        Parameters
+        ----------
+        chunk_size : int, optional
+            If None (default), yields one TileRecord at a time. Otherwise yields TileGrid
+            chunks of chunk_size tiles (the last one may be smaller); chunks can
+            span rows.
+
+        Yields
+        ------
+        TileRecord or TileGrid
+        """
+        pending = []
+        n_pending = 0
+        for each_y in self.get_row_ids():
+            row_grid = self.get_tile_grid_for_rows([each_y])
+            if chunk_size is None:
+                yield from row_grid
+                continue
+            pending.append(row_grid)
+            n_pending += len(row_grid)
+            if n_pending < chunk_size:
+                continue
+            merged = TileGrid.concatenate(pending)
+            for start in range(0, len(merged) - chunk_size + 1, chunk_size):
+                yield merged[start:start + chunk_size]
+            leftover = merged[len(merged) - len(merged) % chunk_size:]
+            pending = [leftover]
+            n_pending = len(leftover)
+        if n_pending > 0:
+            yield TileGrid.concatenate(pending)
+
+    def get_tiles_from_wgs_bbox(self) -> List[TileRecord]:
+        return list(self.iter_tiles())
     
     def get_tileid_by_wgs(self, wgs_pt:WgsPoint) -> TileID:
         id_x = self.get_y_by_lat(wgs_pt.lat)
@@ -204,7 +485,7 @@ class Tileset(abc.ABC):
         return Tile(id, self)
     
     def plot_tiles(self):
-        plot_shapely(self.get_tiles_from_wgs_bbox())
+        plot_shapely([each_tile.polygon for each_tile in self.iter_tiles()])
 
 class OsmTileset(Tileset):
     """_summary_
@@ -214,33 +495,39 @@ class OsmTileset(Tileset):
         self.zoom = zoom
         #self.tile_id_bbox = self.get_tile_id_bbox()
 
-    def get_tiles_from_wgs_bbox(self) -> List[Tile]:
-        tile_list = []
-        tile_bound_north = self.get_y_by_lat(self.bounds.north)
-        tile_bound_south = self.get_y_by_lat(self.bounds.south)
+    def get_row_ids(self, bounds:WgsBBox=None) -> np.ndarray:
+        if bounds is None:
+            bounds = self.bounds
+        tile_bound_north = self.get_y_by_lat(bounds.north)
+        tile_bound_south = self.get_y_by_lat(bounds.south)
         # Stupid OSM defining south as positive
-        for y in range(tile_bound_north, tile_bound_south + 1):
-            # TODO: refactor this
-            pm_tile = Tile(TileID(0, y), self)
-            curr_lat = pm_tile.north
-            tile_bound_west = self.get_x_by_lon_lat(self.bounds.west, curr_lat)
-            tile_bound_east = self.get_x_by_lon_lat(self.bounds.east, curr_lat)
-            for x in range(tile_bound_west, tile_bound_east + 1):
-                #tile_id = GeoPoint(x,y)
-                id = TileID(x, y)
-                new_tile = Tile(id, self)
-                tile_list.append(new_tile)
-        return tile_list
+        return np.arange(tile_bound_north, tile_bound_south + 1, dtype=np.int64)
     
     def get_y_by_lat(self, lat_deg):
-        lat_rad = np.radians(lat_deg)
-        id_y = int(np.floor((1.0 - np.arcsinh(np.tan(lat_rad)) / np.pi) / 2.0 * (2.0 ** self.zoom)))
-        return id_y
+        return int(self.get_y_by_lat_batch(lat_deg))
     
     def get_x_by_lon_lat(self, lon_deg, lat_deg):
+        return int(self.get_x_by_lon_lat_batch(lon_deg, lat_deg))
+
+    def get_y_by_lat_batch(self, lat_deg) -> np.ndarray:
         lat_rad = np.radians(lat_deg)
-        id_x = int(np.floor((lon_deg + 180.0) / 360.0 * (2.0 ** self.zoom)))
-        return id_x
+        id_y = np.floor((1.0 - np.arcsinh(np.tan(lat_rad)) / np.pi) / 2.0 * (2.0 ** self.zoom))
+        return id_y.astype(np.int64)
+
+    def get_x_by_lon_lat_batch(self, lon_deg, lat_deg) -> np.ndarray:
+        # OSM columns don't depend on latitude; broadcast so the shape still matches
+        lon_deg, _ = np.broadcast_arrays(np.asarray(lon_deg, dtype=np.float64), lat_deg)
+        id_x = np.floor((lon_deg + 180.0) / 360.0 * (2.0 ** self.zoom))
+        return id_x.astype(np.int64)
+
+    def get_wgs_box_by_id_batch(self, x, y) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        x, y = np.broadcast_arrays(np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64))
+        n_tiles = 2.0 ** self.zoom
+        west_deg = x / n_tiles * 360.0 - 180.0
+        east_deg = (x + 1) / n_tiles * 360.0 - 180.0
+        north_deg = np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * y / n_tiles))))
+        south_deg = np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * (y + 1) / n_tiles))))
+        return north_deg, west_deg, south_deg, east_deg
     
     #def get_tileid_by_wgs(self, wgs_pt:WgsPoint) -> TileID:
     #    id_x = self.get_y_by_lat(wgs_pt.lat)
@@ -295,39 +582,114 @@ class OsmTileset(Tileset):
     def __str__(self) -> str:
         return str({k: str(v) for (k, v) in vars(self).items()})
     
+# Max number of EquiviTiles rows kept in the row cache, across all tilesets
+EQUIVITILES_ROW_CACHE_SIZE = 65536
+
+# Distances within this many meters of a tile edge count as on it, so edge coordinates
+# (e.g. the latitudes get_equivitiles_row returns) get the same id whichever geodesic
+# solver measured them
+EQUIVITILES_EDGE_TOL_M = 1e-6
+
+def snap_to_tile_edges(dist_m, chip_size_m) -> np.ndarray:
+    """
+    dist_m in tiles (dist_m / chip_size_m), with values within EQUIVITILES_EDGE_TOL_M of
+    a tile edge snapped onto it.
+    """
+    tiles = np.asarray(dist_m, dtype=np.float64) / chip_size_m
+    edges = np.round(tiles)
+    return np.where(np.abs(tiles - edges) * chip_size_m < EQUIVITILES_EDGE_TOL_M, edges, tiles)
+
+@lru_cache(maxsize=EQUIVITILES_ROW_CACHE_SIZE)
+def get_equivitiles_row(chip_size_m, y:int) -> Tuple[float, float, float, float]:
+    """
+    Everything an EquiviTiles row needs to bound its tiles. Every tile in a row
+    shares the same meridian distance and the same metres per degree along its
+    parallels, so this is memoized on (chip_size_m, y).
+
+    Parameters
+    ----------
+    chip_size_m : int
+        Tile size in meters.
+    y : int
+        Row id.
+
+    Returns
+    -------
+    Tuple[float, float, float, float]
+        north and south latitudes (deg) of the row, and the degrees of longitude
+        per meter along the northern and southern parallels.
+    """
+    nw_pm = move_along_meridian(WgsPoint(0, 0), y * chip_size_m)
+    sw_pm = move_along_meridian(nw_pm, -chip_size_m)
+    deg_per_m_north = move_along_parallel(nw_pm, 1.0).lon
+    deg_per_m_south = move_along_parallel(sw_pm, 1.0).lon
+    return nw_pm.lat, sw_pm.lat, deg_per_m_north, deg_per_m_south
+
 class EquiviTilesTileset(Tileset):
     def __init__(self, bounds: WgsBBox, chip_size_m) -> None:
         super().__init__(bounds)
         self.chip_size_m = chip_size_m
 
+    @staticmethod
+    def row_cache_info():
+        """
+        Hit/miss counts of the shared row cache (see get_equivitiles_row).
+        """
+        return get_equivitiles_row.cache_info()
+
+    def get_rows_batch(self, y) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Looks up get_equivitiles_row once per distinct row in y.
+
+        Returns
+        -------
+        Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+            north, south, deg_per_m_north, deg_per_m_south, broadcast to y's shape.
+        """
+        y = np.asarray(y, dtype=np.int64)
+        unique_ys, inverse = np.unique(y, return_inverse=True)
+        rows = np.array([get_equivitiles_row(self.chip_size_m, int(each_y)) for each_y in unique_ys],
+                        dtype=np.float64).reshape(-1, 4)
+        rows = rows[inverse.reshape(y.shape)]
+        return rows[..., 0], rows[..., 1], rows[..., 2], rows[..., 3]
+
     def get_x_by_lon_lat(self, lon_deg, lat_deg)->int:
-        lat_parallel = WgsPoint(0.0, lat_deg)
-        lon_degpm = geodesic(lat_parallel, WgsPoint(1, lat_deg)).m
-        lon_dist_m = abs(lon_degpm * lon_deg)
-        tile_id_x = np.sign(lon_deg) * np.floor(lon_dist_m/self.chip_size_m)
-        #tile_id_x = np.ceil(lon_dist_m/self.chip_size_m)
-        return int(tile_id_x)
+        # one code path for scalar and batch lookups, so both always agree
+        return int(self.get_x_by_lon_lat_batch(lon_deg, lat_deg))
 
     def get_y_by_lat(self, lat_deg)->int:
-        origin = WgsPoint(0, 0)
-        lat_parallel = WgsPoint(0.0, lat_deg)
-        lat_dist_m = abs(geodesic(origin, lat_parallel).m)
-        tile_id_y = np.sign(lat_deg) * np.ceil(lat_dist_m/self.chip_size_m)
-        #tile_id_y = np.ceil(lat_dist_m/self.chip_size_m)
-        return int(tile_id_y)
+        return int(self.get_y_by_lat_batch(lat_deg))
 
     def get_wgs_box_by_id(self, id:TileID) -> WgsBBox:
-        origin = WgsPoint(0, 0)
-        lat_dist = id.y * self.chip_size_m
-        lat_parallel_pm = move_along_meridian(origin, lat_dist)
-        assert(lat_parallel_pm.longitude == 0.0)
-
-        lon_dist = self.chip_size_m * id.x
-        nw_pt = move_along_parallel(lat_parallel_pm, lon_dist)
-        assert(nw_pt.latitude == lat_parallel_pm.latitude)
-        sw_pt = move_along_meridian(nw_pt, -self.chip_size_m)
-        se_pt = move_along_parallel(sw_pt, self.chip_size_m)
-        return WgsBBox(nw_pt, se_pt)
+        # Equivalent to walking origin -> nw -> sw -> se along meridians and parallels,
+        # with the per row geodesics coming out of the row cache
+        north, south, deg_per_m_north, deg_per_m_south = get_equivitiles_row(self.chip_size_m, id.y)
+        west = deg_per_m_north * (self.chip_size_m * id.x)
+        east = west + deg_per_m_south * self.chip_size_m
+        return WgsBBox((west, north), (east, south))
+
+    def get_x_by_lon_lat_batch(self, lon_deg, lat_deg) -> np.ndarray:
+        lon_deg, lat_deg = np.broadcast_arrays(np.asarray(lon_deg, dtype=np.float64),
+                                               np.asarray(lat_deg, dtype=np.float64))
+        lon_degpm = m_per_deg_along_parallel(lat_deg)
+        lon_dist_m = np.abs(lon_degpm * lon_deg)
+        tile_id_x = np.sign(lon_deg) * np.floor(snap_to_tile_edges(lon_dist_m, self.chip_size_m))
+        return tile_id_x.astype(np.int64)
+
+    def get_y_by_lat_batch(self, lat_deg) -> np.ndarray:
+        lat_deg = np.asarray(lat_deg, dtype=np.float64)
+        zeros = np.zeros_like(lat_deg)
+        _, _, lat_dist_m = WGS84_GEOD.inv(zeros, zeros, zeros, lat_deg)
+        lat_dist_m = np.abs(lat_dist_m)
+        tile_id_y = np.sign(lat_deg) * np.ceil(snap_to_tile_edges(lat_dist_m, self.chip_size_m))
+        return tile_id_y.astype(np.int64)
+
+    def get_wgs_box_by_id_batch(self, x, y) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        x, y = np.broadcast_arrays(np.asarray(x, dtype=np.int64), np.asarray(y, dtype=np.int64))
+        north, south, deg_per_m_north, deg_per_m_south = self.get_rows_batch(y)
+        west = deg_per_m_north * (self.chip_size_m * x)
+        east = west + deg_per_m_south * self.chip_size_m
+        return north, west, south, east
 
 
 if __name__ == "__main__":
@@ -0,0 +1,155 @@
+import json
+import os
+from typing import List
+
+import geopandas
+import pandas as pd
+from shapely.geometry import Polygon, mapping, shape
+
+from inferaster.utils.geo_shapes import WgsBBox
+from inferaster.utils.geotiff import Geotiff
+
+
+class FootprintIndex():
+    """
+    On disk index of geotiff footprints, stored as JSON (by default next to metadata.json).
+    For every tiff it records the file size and mtime it was indexed at, its CRS, its WGS84
+    bounding box, its exact (find_exact) footprint and its WGS84 valid data footprint
+    (Geotiff.get_valid_footprint), so the chipper can build its tiff dataframe without
+    reopening every tiff on every run. Only new or changed files are reopened on update.
+    """
+    VERSION = 2
+
+    def __init__(self, index_path:str) -> None:
+        """
+
+        Parameters
+        ----------
+        index_path : str
+            Path to the index json; it is created on first save if it doesn't exist.
+        """
+        self.index_path = index_path
+        self.index_dir = os.path.dirname(os.path.abspath(index_path))
+        self.entries = {}
+        if os.path.exists(index_path):
+            with open(index_path, 'r') as indexfp:
+                index_json = json.load(indexfp)
+            # Older/unknown formats are simply rebuilt
+            if index_json.get("version") == self.VERSION:
+                self.entries = index_json["tiffs"]
+
+    def get_key(self, tiff_path:str) -> str:
+        return os.path.relpath(os.path.abspath(tiff_path), self.index_dir)
+
+    def get_full_path(self, key:str) -> str:
+        return os.path.normpath(os.path.join(self.index_dir, key))
+
+    def is_stale(self, tiff_path:str) -> bool:
+        """
+        True if the tiff isn't indexed, or its size or mtime changed since it was.
+        """
+        entry = self.entries.get(self.get_key(tiff_path))
+        if entry is None:
+            return True
+        stat = os.stat(tiff_path)
+        return entry["size"] != stat.st_size or entry["mtime_ns"] != stat.st_mtime_ns
+
+    def index_one(self, tiff_path:str) -> dict:
+        """
+        Opens one tiff and records its footprint.
+        """
+        stat = os.stat(tiff_path)
+        gtiff = Geotiff(tiff_path)
+        try:
+            wgs_bounds = gtiff.wgs_bounds
+            entry = {
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "crs": str(gtiff.src_crs),
+                "wgs_bounds": [wgs_bounds.west, wgs_bounds.north, wgs_bounds.east, wgs_bounds.south],
+                "exact_footprint": gtiff.find_exact().tolist(),
+                "valid_footprint": mapping(gtiff.get_valid_footprint()),
+            }
+        finally:
+            gtiff.close()
+        self.entries[self.get_key(tiff_path)] = entry
+        return entry
+
+    def update(self, tiff_paths:List[str]) -> bool:
+        """
+        Brings the index in line with tiff_paths: indexes new or changed tiffs, and drops
+        entries for tiffs no longer in the list.
+
+        Parameters
+        ----------
+        tiff_paths : List[str]
+            Every tiff that should be in the index.
+
+        Returns
+        -------
+        bool
+            True if anything changed (i.e. the index should be saved).
+        """
+        changed = False
+        keep_keys = set()
+        for each_tiff in tiff_paths:
+            keep_keys.add(self.get_key(each_tiff))
+            if not self.is_stale(each_tiff):
+                continue
+            try:
+                self.index_one(each_tiff)
+                changed = True
+                print("indexed {}".format(each_tiff))
+            except Exception as e:
+                print("ERROR: could not index {}: {}".format(each_tiff, e))
+        for each_key in list(self.entries.keys()):
+            if each_key not in keep_keys:
+                del self.entries[each_key]
+                changed = True
+        return changed
+
+    def save(self) -> None:
+        """
+        Writes the index to disk; written to a temp file first so an interrupted run
+        can't leave a truncated index behind.
+        """
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, 'w') as indexfp:
+            json.dump({"version": self.VERSION, "tiffs": self.entries}, indexfp)
+        os.replace(tmp_path, self.index_path)
+
+    def to_gdf(self) -> geopandas.GeoDataFrame:
+        """
+        Builds the same dataframe BaseChipper.get_all_tiffs_gdf does (img_name, full_path,
+        geometry of WGS84 bounds), plus the src_crs, exact_footprint and valid_footprint columns.
+        Tiffs with no valid pixels (an empty valid_footprint) are left out; they stay in the
+        index, so they aren't reopened on every update.
+
+        Returns
+        -------
+        geopandas.GeoDataFrame
+            One row per indexed tiff.
+        """
+        img_names = []
+        full_paths = []
+        crs_list = []
+        exact_footprints = []
+        valid_footprints = []
+        tiff_bboxes = []
+        for each_key in sorted(self.entries.keys()):
+            entry = self.entries[each_key]
+            valid_footprint = shape(entry["valid_footprint"])
+            if valid_footprint.is_empty:
+                continue
+            full_path = self.get_full_path(each_key)
+            full_paths.append(full_path)
+            img_names.append(full_path.split(os.path.sep)[-1])
+            crs_list.append(entry["crs"])
+            exact_footprints.append(Polygon(entry["exact_footprint"]))
+            valid_footprints.append(valid_footprint)
+            west, north, east, south = entry["wgs_bounds"]
+            tiff_bboxes.append(WgsBBox((west, north), (east, south)))
+        df = pd.DataFrame({"img_name": img_names, "full_path": full_paths,
+                           "src_crs": crs_list, "exact_footprint": exact_footprints,
+                           "valid_footprint": valid_footprints})
+        return geopandas.GeoDataFrame(df, geometry=tiff_bboxes)
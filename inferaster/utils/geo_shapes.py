@@ -116,6 +116,10 @@ class GeoBBox(Polygon):
     def sw(self):
         return GeoPoint(self.west, self.south)
     
+    def __reduce__(self):
+        # shapely's default pickling rebuilds with no args, which our __init__ can't take
+        return (self.__class__, ((self.west, self.north), (self.east, self.south)))
+
     def __str__(self):
         type_string = type_string = str(type(self))
         s = type_string.split('.')[-1].split('\'')[0] + '('
@@ -3,9 +3,10 @@
 from re import T
 import rasterio
 import rasterio.features
+import rasterio.shutil
+import rasterio.enums
 from rasterio.windows import Window
 import numpy as np
-import pyproj
 from matplotlib import pyplot as plt
 import random
 import os
@@ -14,11 +15,18 @@ from rasterio._err import CPLE_NotSupportedError
 import yaml
 import argparse
 from inferaster.utils.geo_shapes import WgsBBox
+from shapely.geometry import shape
+from shapely.ops import unary_union, transform as shapely_transform
+from inferaster.utils.raster_cache import RasterCache
+from inferaster.utils.great_circles import WGS84_GEOD
 import warnings
 import json
 import math
-from rasterio.warp import reproject, Resampling
+from rasterio.warp import Resampling
+from rasterio.vrt import WarpedVRT
 from affine import Affine
+from functools import lru_cache, cached_property
+from pyproj import Transformer
 
 warnings.filterwarnings("ignore")
 
@@ -30,33 +38,270 @@ warnings.filterwarnings("ignore")
 # TODO - make another class for chipping function 
 # TODO merge with geo_shapes?
 
+WGS84_CRS = "EPSG:4326"
+ECEF_CRS = "EPSG:4978"
+
+
+def get_crs_key(crs) -> str:
+    """
+    Hashable, lossless key for a CRS given as a rasterio/pyproj CRS or any string pyproj
+    accepts.
+    """
+    if hasattr(crs, "to_wkt"):
+        return crs.to_wkt()
+    return str(crs)
+
+@lru_cache(maxsize=None)
+def get_transformer_by_key(src_key:str, dst_key:str) -> Transformer:
+    return Transformer.from_crs(src_key, dst_key, always_xy=True)
+
+def get_transformer(src_crs, dst_crs) -> Transformer:
+    """
+    Process wide cached pyproj Transformer from src_crs to dst_crs. Axis order is always
+    x, y (lon, lat for geographic CRSs), and each CRS keeps its own units.
+
+    Parameters
+    ----------
+    src_crs : rasterio.crs.CRS, pyproj.CRS or str
+        CRS to transform from
+    dst_crs : rasterio.crs.CRS, pyproj.CRS or str
+        CRS to transform to
+
+    Returns
+    -------
+    Transformer
+        Shared transformer; transform whole arrays of points with one call to it
+    """
+    return get_transformer_by_key(get_crs_key(src_crs), get_crs_key(dst_crs))
+
+
+def get_affine_matrices(affine:Affine):
+    """
+    Forward and inverse 2x3 matrices of an affine, for apply_affine_matrix.
+    """
+    forward = np.array(affine, dtype=float).reshape(3, 3)[:2]
+    inverse = np.array(~affine, dtype=float).reshape(3, 3)[:2]
+    return forward, inverse
+
+def apply_affine_matrix(matrix:np.ndarray, xy) -> np.ndarray:
+    """
+    Applies a 2x3 affine matrix to an Nx2 array of x, y points in one vectorized op.
+    """
+    xy = np.atleast_2d(np.asarray(xy, dtype=float))
+    return xy @ matrix[:, :2].T + matrix[:, 2]
+
+
+# Side of the super windows wgs84_bboxes_to_rio_chips reads, in blocks, and the most
+# bytes (all bands) one super window read may take; cells shrink to fit many band rasters
+SUPER_WINDOW_BLOCKS = 8
+SUPER_WINDOW_MAX_BYTES = 256 * 1024**2
+
+# Validity mask estimate_valid_fraction checks chips against: the source's mask decimated
+# this many times per side, sampled on a VALIDITY_SAMPLES x VALIDITY_SAMPLES grid per chip
+VALIDITY_DECIMATION = 16
+VALIDITY_SAMPLES = 8
+# Validity masks kept per process (see get_validity_mask_by_key)
+VALIDITY_CACHE_SIZE = 64
+
+@lru_cache(maxsize=VALIDITY_CACHE_SIZE)
+def get_validity_mask_by_key(path:str, mtime_ns:int, size:int) -> np.ndarray:
+    """
+    Geotiff.validity_mask of the tiff at path, cached on its mtime and size so a changed
+    file is read again. Read through the dataset mask, so GDAL can serve it from overviews
+    and mask bands instead of full resolution data. The returned mask is shared, and read only.
+    """
+    with rasterio.open(path) as reader:
+        out_height = max(1, -(-reader.height // VALIDITY_DECIMATION))
+        out_width = max(1, -(-reader.width // VALIDITY_DECIMATION))
+        mask = reader.dataset_mask(out_shape=(out_height, out_width)) > 0
+    mask.flags.writeable = False
+    return mask
+
+# Points pix_bbox_to_wgs84 reprojects at a time
+PIX_GRID_CHUNK_PIXELS = 1 << 20
+
+# Working memory GDAL may use per warp chunk when rotating, in MB
+ROTATE_WARP_MEM_LIMIT = 256
+
+
+def rotate_raster(in_file, out_file, angle, shift_x=0, shift_y=0, adj_width=0, adj_height=0,
+                  warp_mem_limit=ROTATE_WARP_MEM_LIMIT, num_threads=1):
+    """
+    Writes a copy of in_file rotated by angle (and padded/shifted so the whole scene stays
+    in frame) to out_file. All bands are warped straight from the source dataset into a
+    tiled output, chunk by chunk, so peak memory is bounded by warp_mem_limit rather than
+    by the size of the scene. As with the original in memory rotation, the source's nodata
+    value is copied through like any other value; only pixels outside the source are 255.
+
+    Parameters
+    ----------
+    in_file : str
+        Path of the geotiff to rotate
+    out_file : str
+        Path to write the rotated geotiff to
+    angle : float
+        Rotation in degrees
+    shift_x : float, optional
+        Pixel shift along x after rotating, by default 0
+    shift_y : float, optional
+        Pixel shift along y after rotating, by default 0
+    adj_width : float, optional
+        Pixels added to the output width, by default 0
+    adj_height : float, optional
+        Pixels added to the output height, by default 0
+    warp_mem_limit : int, optional
+        Working memory for each warp chunk in MB, by default ROTATE_WARP_MEM_LIMIT
+    num_threads : int, optional
+        Threads GDAL warps with, by default 1
+    """
+    with rasterio.open(in_file) as src:
+
+        # Get the old transform and crs
+        src_transform = src.transform
+        crs = src.crs
+
+        # Affine transformations for rotation and translation
+        rotate = Affine.rotation(angle)
+        trans_x = Affine.translation(shift_x,0)
+        trans_y = Affine.translation(0, -shift_y)
+
+        # Combine affine transformations
+        dst_transform = src_transform * rotate * trans_x * trans_y
+
+        # Get the new shape
+        dst_height = int(src.height + adj_height)
+        dst_width = int(src.width + adj_width)
+
+        # src_nodata=None: keep source nodata pixels as they are, only fill outside the source
+        with WarpedVRT(src, crs=crs, transform=dst_transform, width=dst_width, height=dst_height,
+                       src_nodata=None, nodata=255, resampling=Resampling.nearest,
+                       warp_mem_limit=warp_mem_limit, warp_extras={"NUM_THREADS": num_threads}) as vrt:
+            # tiled so the warp writes back in blocks
+            rasterio.shutil.copy(vrt, out_file, driver="GTiff", tiled=True, blockxsize=512,
+                                 blockysize=512, BIGTIFF="IF_SAFER")
+
+
+def get_sidecar_path(tiff_path:str) -> str:
+    return tiff_path + ".json"
+
+def write_sidecar(tiff_path:str, metadata_dict:dict) -> None:
+    """
+    Writes metadata for a tiff to its JSON sidecar (tiff_path + ".json") instead of into the
+    tiff's tags, so the tiff itself is never reopened for writing.
+    """
+    sidecar_path = get_sidecar_path(tiff_path)
+    tmp_path = "{}.{}.tmp".format(sidecar_path, os.getpid())
+    with open(tmp_path, 'w') as sidecarfp:
+        json.dump(metadata_dict, sidecarfp)
+    os.replace(tmp_path, sidecar_path)
+
+def read_sidecar(tiff_path:str) -> dict:
+    """
+    Metadata from a tiff's JSON sidecar, or None if it has none.
+    """
+    sidecar_path = get_sidecar_path(tiff_path)
+    if not os.path.exists(sidecar_path):
+        return None
+    with open(sidecar_path, 'r') as sidecarfp:
+        return json.load(sidecarfp)
+
+def is_cog_layout(tiff_path:str, blocksize=512) -> bool:
+    """
+    True if the tiff is already internally tiled, compressed and, if it is big enough to
+    get any (see write_cog), has overviews.
+    """
+    with rasterio.open(tiff_path) as src:
+        needs_overviews = max(src.width, src.height) / 2 >= blocksize
+        has_overviews = bool(src.overviews(1)) or not needs_overviews
+        return bool(src.profile.get("tiled") and src.compression is not None and has_overviews)
+
+def write_cog(in_file, out_file, compress="deflate", blocksize=512, resampling=Resampling.nearest):
+    """
+    Rewrites in_file as an internally tiled, compressed geotiff with overviews, so windowed
+    reads only decode the blocks they touch. The copy is streamed by GDAL, and tags are
+    carried over. Overviews are halvings down to about one block.
+
+    Parameters
+    ----------
+    in_file : str
+        Path of the geotiff to rewrite
+    out_file : str
+        Path to write to; must not be in_file
+    compress : str, optional
+        GDAL compression, by default "deflate"
+    blocksize : int, optional
+        Side of the internal tiles in pixels, by default 512
+    resampling : Resampling, optional
+        How overviews are resampled, by default Resampling.nearest
+    """
+    rasterio.shutil.copy(in_file, out_file, driver="GTiff", tiled=True, blockxsize=blocksize,
+                         blockysize=blocksize, compress=compress, BIGTIFF="IF_SAFER")
+    with rasterio.open(out_file, 'r+') as dst:
+        factors = []
+        factor = 2
+        while max(dst.width, dst.height) / factor >= blocksize:
+            factors.append(factor)
+            factor *= 2
+        if factors:
+            dst.build_overviews(factors, resampling)
+            dst.update_tags(ns='rio_overview', resampling=resampling.name)
+
+
 class Geotiff:
-    def __init__(self, geotiff_path):
+    def __init__(self, geotiff_path, mode='r'):
+        """
+
+        Parameters
+        ----------
+        geotiff_path : str
+            Path of the geotiff to open
+        mode : str, optional
+            rasterio open mode, by default 'r'. Only 'r+' allows write_tags.
+        """
+        if mode not in ('r', 'r+'):
+            raise ValueError("Valid options for mode are r, and r+")
         self.geo_path = geotiff_path
-        self.geo_reader = rasterio.open(geotiff_path, 'r+')
+        self.mode = mode
+        self.geo_reader = rasterio.open(geotiff_path, mode)
         self.src_affine = self.geo_reader.transform
+        self.src_forward, self.src_inverse = get_affine_matrices(self.src_affine)
         self.src_crs = self.geo_reader.crs
+        # self.show_bounds(cords_set = [self.find_exact()], bbox_set = [self.geo_bounds])
+        self.rotated_geo_reader = None
+
+    # The bounds are computed on first use and kept; most callers only need one of them
 
+    @cached_property
+    def geo_bounds(self) -> np.ndarray:
         bounds = self.geo_reader.bounds
-        self.geo_bounds = np.array([[bounds.left, bounds.top],
+        return np.array([[bounds.left, bounds.top],
                         [bounds.right, bounds.bottom]])
-        pixel_bounds_arr = self.geo_to_pix(self.geo_bounds)
-        self.pixel_bounds = pixel_bounds_arr
+
+    @cached_property
+    def pixel_bounds(self) -> np.ndarray:
+        return self.geo_to_pix(self.geo_bounds)
+
+    @cached_property
+    def wgs84_bounds(self) -> np.ndarray:
         # TODO This is a VERY hacky way to ensure back compatibility;
         # ultimately, wgs84_bounds code needs to be re written, and
         # geotiff also rewritten to work with geo_shapes
         try:
-            wgs_bounds_arr = self.geo_to_wgs84(self.geo_bounds)
+            return self.geo_to_wgs84(self.geo_bounds)
         except:
-            wgs_bounds_arr = np.array([[bounds.left, bounds.top],
-                        [bounds.right, bounds.bottom]])
-        self.wgs84_bounds = wgs_bounds_arr
-        self.wgs_bounds = WgsBBox(wgs_bounds_arr[0], wgs_bounds_arr[1])
-        # self.show_bounds(cords_set = [self.find_exact()], bbox_set = [self.geo_bounds])
-        
+            return self.geo_bounds.copy()
 
+    @cached_property
+    def wgs_bounds(self) -> WgsBBox:
+        return WgsBBox(self.wgs84_bounds[0], self.wgs84_bounds[1])
 
     def close(self):
+        if self.rotated_geo_reader is not None:
+            self.rotated_geo_reader.close()
+            self.rotated_geo_reader = None
+        # drop the memory map, if read_window made one; views already handed out stay valid
+        self.__dict__.pop("raster_memmap", None)
+        self.__dict__.pop("validity_mask", None)
         self.geo_reader.close()
 
     def geo_to_pix(self, geo_xy):
@@ -65,10 +310,7 @@ class Geotiff:
         object representing the affine transformation between raster and
         2D geographic space
         """
-        geo_xy = np.atleast_2d(geo_xy)
-        A = np.array(self.src_affine).reshape(3, 3)
-        xy1 = np.vstack((geo_xy.T, np.ones(geo_xy.shape[0],)))
-        return np.dot(np.linalg.inv(A), xy1).T[:, 0:2]
+        return apply_affine_matrix(self.src_inverse, geo_xy)
 
     def geo_to_wgs84(self, geo_xy):
         """
@@ -76,8 +318,7 @@ class Geotiff:
         format and returns an Nx2 numpy.ndarray of Longitude, Latitude in Degrees
         """
         geo_xy = np.atleast_2d(geo_xy)
-        lng, lat = rasterio.warp.transform(self.src_crs, {'init': 'epsg:4326'},
-                                        geo_xy[:, 0], geo_xy[:, 1])
+        lng, lat = get_transformer(self.src_crs, WGS84_CRS).transform(geo_xy[:, 0], geo_xy[:, 1])
         return np.array([lng, lat]).T
 
     def pix_to_geo(self, pix_xy):
@@ -86,10 +327,7 @@ class Geotiff:
         object representing the affine transformation between raster and
         2D geographic space
         """
-        pix_xy = np.atleast_2d(pix_xy)
-        A = np.array(self.src_affine).reshape(3, 3)
-        xy1 = np.vstack((pix_xy.T, np.ones(pix_xy.shape[0],)))
-        return np.dot(A, xy1).T[:, 0:2]
+        return apply_affine_matrix(self.src_forward, pix_xy)
 
     def pix_to_wgs84(self, pix):
         """
@@ -109,9 +347,7 @@ class Geotiff:
         coordinates represented in the rasterio crs \
         """
         lon_lat = np.atleast_2d(lon_lat)
-        p1 = pyproj.Proj(init='epsg:4326')
-        p2 = pyproj.Proj(self.src_crs, preserve_units=True)
-        geo = np.array(pyproj.transform(p1, p2, lon_lat[:, 0], lon_lat[:, 1]))
+        geo = np.array(get_transformer(WGS84_CRS, self.src_crs).transform(lon_lat[:, 0], lon_lat[:, 1]))
         return geo.T
 
     def wgs84_to_pix(self, lon_lat):
@@ -129,17 +365,63 @@ class Geotiff:
         return pix
 
 
-    def pix_bbox_to_wgs84(self, bbox):
+    def pix_bbox_to_wgs84(self, bbox, dtype=np.float64, chunk_pixels=PIX_GRID_CHUNK_PIXELS):
         """
         Takes in a bbox representing a chip in geotiff image,
         returns a grid representing the WGS84 location of each
         pixel in the chip.
+
+        Parameters
+        ----------
+        bbox : array_like
+            [[left, top], [right, bottom]] pixel bounds, inclusive
+        dtype : np.dtype, optional
+            dtype of the grid, by default np.float64; np.float32 halves its size
+        chunk_pixels : int, optional
+            pixels reprojected at a time, by default PIX_GRID_CHUNK_PIXELS
+
+        Returns
+        -------
+        np.ndarray
+            (r-l+1, b-t+1, 2) grid of lon, lat; indexed [column, row]
         """
         l, t = bbox[0]
         r, b = bbox[1]
-        pix_grid = np.array(np.meshgrid(np.arange(l,r+1), np.arange(t,b+1))).T.reshape(-1,2)
-        wgs_grid = self.pix_to_wgs84(pix_grid).reshape(r-l+1, b-t+1, 2)
+        wgs_grid = np.empty((r-l+1, b-t+1, 2), dtype=dtype)
+        for row_offset, wgs_block in self.iter_pix_bbox_to_wgs84(bbox, dtype, chunk_pixels):
+            wgs_grid[:, row_offset:row_offset + wgs_block.shape[1]] = wgs_block
         return  wgs_grid
+
+    def iter_pix_bbox_to_wgs84(self, bbox, dtype=np.float64, chunk_pixels=PIX_GRID_CHUNK_PIXELS):
+        """
+        Streaming version of pix_bbox_to_wgs84: yields the grid a block of rows at a time,
+        so only about chunk_pixels points are held at once. For WGS84 rasters the affine is
+        applied separably (one column term plus one row term) instead of through a
+        meshgrid of pixel coordinates.
+
+        Yields
+        ------
+        Tuple[int, np.ndarray]
+            row offset into the chip, and the (r-l+1, n_rows, 2) block of the grid there
+        """
+        l, t = bbox[0]
+        r, b = bbox[1]
+        cols = np.arange(l, r+1, dtype=np.float64)
+        rows_per_block = max(1, chunk_pixels // len(cols))
+        is_wgs84 = self.src_crs == "epsg:4326"
+        for row_0 in range(t, b+1, rows_per_block):
+            rows = np.arange(row_0, min(row_0 + rows_per_block, b+1), dtype=np.float64)
+            wgs_block = np.empty((len(cols), len(rows), 2), dtype=dtype)
+            if is_wgs84:
+                (x_col, x_row, x_off), (y_col, y_row, y_off) = self.src_forward
+                wgs_block[:, :, 0] = (x_col * cols)[:, None] + (x_row * rows + x_off)[None, :]
+                wgs_block[:, :, 1] = (y_col * cols)[:, None] + (y_row * rows + y_off)[None, :]
+            else:
+                pix_block = np.empty((len(cols), len(rows), 2), dtype=np.float64)
+                pix_block[:, :, 0] = cols[:, None]
+                pix_block[:, :, 1] = rows[None, :]
+                wgs_block[:] = self.pix_to_wgs84(pix_block.reshape(-1, 2)).reshape(wgs_block.shape)
+            yield row_0 - t, wgs_block
     
     def wgs84_bbox_to_chip(self, bbox):
         """
@@ -213,13 +495,15 @@ class Geotiff:
                 im.save("./data/hroi/{}/{}.png".format(filename, filename))
 
     def wgs84_to_ecef(self,lon_lat):
+        lon_lat = np.atleast_2d(lon_lat)
         zero=np.zeros(len(lon_lat))
-        x,y,z = rasterio.warp.transform('epsg:4326', 'epsg:4978',
-                                    lon_lat[:, 0], lon_lat[:, 1], zero)
+        x,y,z = get_transformer(WGS84_CRS, ECEF_CRS).transform(lon_lat[:, 0], lon_lat[:, 1], zero)
         
         return np.array([x,y,z]).T
     
     def write_tags(self, metadata_dict:dict):
+        if self.mode != 'r+':
+            raise ValueError("write_tags needs the Geotiff opened with mode='r+'")
         jstring_dict = {}
         for k,v in metadata_dict.items():
             jstring_dict[k] = json.dumps(v)
@@ -234,6 +518,17 @@ class Geotiff:
             else:
                 tags[k] = v
         return tags
+
+    def read_metadata(self) -> dict:
+        """
+        The tiff's collection metadata: its JSON sidecar if it has one (see write_sidecar),
+        otherwise its tags.
+        """
+        sidecar = read_sidecar(self.geo_path)
+        if sidecar is not None:
+            return sidecar
+        return self.read_tags()
+
     def show_bounds(self,cords_set = [],bbox_set= []):
         """runs and show cords and bbox relitive ot one another
         exampe function is 
@@ -290,16 +585,11 @@ class Geotiff:
         Returns:
             _type_: 
         """
-        affine = np.reshape(np.array(affine),[3,3])
-        main = affine[:2,:2]
-        end = affine[:2,2]
-        box_updated = []
-        for loc in box:
-            mid = np.cross(loc,main)
-            found = mid + end
-            box_updated.append(found)
-        box_update = np.array(box_updated)
-        return box_update[:,:]
+        affine = np.reshape(np.array(affine, dtype=float),[3,3])
+        box = np.atleast_2d(np.asarray(box, dtype=float))
+        # box points are (row, -col); same as np.cross(loc, affine[:2,:2]) + offset per point
+        pix_xy = np.stack((-box[:, 1], box[:, 0]), axis=1)
+        return apply_affine_matrix(affine[:2], pix_xy)
     
     def create_box(self,shape):
         first = [0,0]
@@ -329,120 +619,597 @@ class Geotiff:
         object representing the affine transformation between raster and
         2D geographic space
         """
-        geo_xy = np.atleast_2d(geo_xy)
-        A = np.array(self.rotated_affine).reshape(3, 3)
-        xy1 = np.vstack((geo_xy.T, np.ones(geo_xy.shape[0],)))
-        return np.dot(np.linalg.inv(A), xy1).T[:, 0:2]
+        return apply_affine_matrix(self.rotated_inverse, geo_xy)
     
-    def wgs84_bbox_to_rio_chip(self,bbox):
-        self.save_rotate()
-        f_pixel_chip_bounds = self.wgs84_to_pix_rotated(bbox)
-        pixel_chip_bounds = np.rint(f_pixel_chip_bounds).astype("int")
-        start_col = pixel_chip_bounds[0][0]
-        start_row = pixel_chip_bounds[0][1]
-        end_col = pixel_chip_bounds[1][0]
-        end_row = pixel_chip_bounds[1][1]
-        width = end_col - start_col
-        height = end_row - start_row
-        if width < 0:
-            buff = start_col
-            start_col = end_col
-            end_col = buff
-            width = -1*width
-        if height <0:
-            buff = start_row
-            start_row = end_row
-            end_row = buff
-            height = -1*height
+    def wgs84_bbox_to_rio_chip(self, bbox, rotate_mode="vrt", raster_cache:RasterCache=None,
+                               out_size=None, target_gsd_m=None, resampling=Resampling.nearest,
+                               chip_shape=None):
+        """
+        Takes in a bbox in wgs84 coordinates, returns an image chip of that region
+        from the north aligned (rotated) version of the geotiff, and a rasterio
+        profile to write it with.
+
+        Parameters
+        ----------
+        bbox : array_like
+            [[west, north], [east, south]] in WGS84 degrees
+        rotate_mode : str, optional
+            how the north aligned raster is made, by default "vrt".
+            Options:
+                vrt - warp on the fly through a WarpedVRT; only the pixels the chip needs are resampled
+                file - write out a full rotated copy first (save_rotate) and read from it
+        raster_cache : RasterCache, optional
+            where rotate_mode file keeps its rotations, by default see save_rotate
+        out_size : int or Tuple[int, int], optional
+            resample the chip to this many pixels a side, or to (height, width); by default
+            the chip is read at native resolution
+        target_gsd_m : float, optional
+            resample the chip to this ground sample distance (meters per pixel) instead;
+            ignored if out_size is given, by default None
+        resampling : Resampling, optional
+            resampling used when out_size or target_gsd_m is given, by default Resampling.nearest
+        chip_shape : str or Tuple[int, int], optional
+            how the pixel window is sized, see wgs84_bboxes_to_windows; by default None, which
+            rounds each corner on its own
+        """
+        self.open_rotated(rotate_mode, raster_cache)
+        start_col, start_row, width, height = self.get_chip_windows([bbox], chip_shape)[0]
         window=Window(start_col, start_row, width, height)
-        chip = self.rotated_geo_reader.read(window=window)
+        out_shape = self.get_chip_out_shape(bbox, out_size, target_gsd_m)
+        return self.read_rotated_chip(window, out_shape, resampling)
+
+    def read_rotated_chip(self, window:Window, out_shape=None, resampling=Resampling.nearest):
+        """
+        Reads one window of the north aligned frame, resampled to out_shape if given. A
+        resampled read lets GDAL serve it from the closest overview instead of decoding
+        every full resolution pixel.
+
+        Returns
+        -------
+        Tuple[np.ndarray, dict]
+            chip, profile
+        """
+        if out_shape is None:
+            chip = self.read_rotated_window(window)
+            return chip, self.get_chip_profile(window)
+        out_height, out_width = out_shape
+        chip = self.rotated_geo_reader.read(window=window, resampling=resampling,
+                                            out_shape=(self.rotated_geo_reader.count, out_height, out_width))
+        return chip, self.get_chip_profile(window, out_shape)
+
+    def read_rotated_window(self, window:Window) -> np.ndarray:
+        """
+        Reads one native resolution window of the north aligned frame. When the source is
+        already north aligned (so the frame is the source's own pixel grid) and the window
+        lies inside it, it comes straight from the source through read_window, skipping the
+        warp, and may be a view over a memory map of the file.
+        """
+        if self.is_frame_source_aligned() and self.is_window_inside(window):
+            return self.read_window(window)
+        return self.rotated_geo_reader.read(window=window)
+
+    def is_frame_source_aligned(self) -> bool:
+        """
+        True if the north aligned frame has the same pixel grid as the source, so reading
+        the frame is reading the source (nodata pixels included, see open_rotated_vrt).
+        """
+        return self.rotated_affine == self.src_affine
+
+    def is_window_inside(self, window:Window) -> bool:
+        return (window.col_off >= 0 and window.row_off >= 0 and
+                window.col_off + window.width <= self.geo_reader.width and
+                window.row_off + window.height <= self.geo_reader.height)
+
+    def read_window(self, window:Window) -> np.ndarray:
+        """
+        Reads a window of the source, all bands. For uncompressed, contiguously stored
+        geotiffs (see raster_memmap) this is a zero copy (count, height, width) view over a
+        memory map of the file; otherwise it is a normal rasterio read. Treat the result as
+        read only.
+        """
+        raster = self.raster_memmap
+        if raster is None or not self.is_window_inside(window):
+            return self.geo_reader.read(window=window)
+        row, col = int(window.row_off), int(window.col_off)
+        return raster[:, row:row + int(window.height), col:col + int(window.width)]
+
+    @cached_property
+    def raster_memmap(self) -> np.ndarray:
+        """
+        (count, height, width) view over a read only memory map of the raster data, or None
+        if the file's layout doesn't allow one: it has to be an uncompressed, striped GTiff
+        whose strips (and bands, if band interleaved) are stored back to back.
+        """
+        try:
+            return self.get_raster_memmap()
+        except Exception:
+            return None
+
+    def get_raster_memmap(self) -> np.ndarray:
+        src = self.geo_reader
+        if (src.driver != "GTiff" or src.compression is not None or src.profile.get("tiled") or
+                len(set(src.dtypes)) != 1 or "NBITS" in src.tags(ns="IMAGE_STRUCTURE")):
+            return None
+        with open(self.geo_path, 'rb') as tifffp:
+            byte_order = tifffp.read(2)
+        if byte_order not in (b"II", b"MM"):
+            return None
+        dtype = np.dtype(src.dtypes[0]).newbyteorder("<" if byte_order == b"II" else ">")
+        band_interleaved = src.interleaving == rasterio.enums.Interleaving.band and src.count > 1
+        pixel_count = 1 if band_interleaved else src.count
+        row_bytes = src.width * pixel_count * dtype.itemsize
+        band_bytes = row_bytes * src.height
+        rows_per_strip = src.block_shapes[0][0]
+        last_strip = (src.height - 1) // rows_per_strip
+        first_offset = int(src.get_tag_item("BLOCK_OFFSET_0_0", "TIFF", bidx=1) or 0)
+        if first_offset == 0:
+            return None
+        # first and last strip of the first and last band must sit where a contiguous layout puts them
+        bands_to_check = [1, src.count] if band_interleaved else [1]
+        for each_band in bands_to_check:
+            band_offset = first_offset + (each_band - 1) * band_bytes * band_interleaved
+            for each_strip in (0, last_strip):
+                offset = src.get_tag_item("BLOCK_OFFSET_0_{}".format(each_strip), "TIFF", bidx=each_band)
+                if offset is None or int(offset) != band_offset + each_strip * rows_per_strip * row_bytes:
+                    return None
+        total_bytes = band_bytes * (src.count if band_interleaved else 1)
+        if os.path.getsize(self.geo_path) < first_offset + total_bytes:
+            return None
+        if band_interleaved:
+            return np.memmap(self.geo_path, dtype=dtype, mode='r', offset=first_offset,
+                             shape=(src.count, src.height, src.width))
+        raster = np.memmap(self.geo_path, dtype=dtype, mode='r', offset=first_offset,
+                           shape=(src.height, src.width, src.count))
+        return raster.transpose(2, 0, 1)
+
+    def get_chip_out_shape(self, bbox, out_size=None, target_gsd_m=None):
+        """
+        (height, width) a chip of bbox is resampled to; None for native resolution.
+        See wgs84_bbox_to_rio_chip.
+        """
+        if out_size is not None:
+            if np.isscalar(out_size):
+                return int(out_size), int(out_size)
+            return int(out_size[0]), int(out_size[1])
+        if target_gsd_m is None:
+            return None
+        (west, north), (east, south) = np.asarray(bbox, dtype=float)
+        mid_lon, mid_lat = (west + east) / 2, (north + south) / 2
+        _, _, width_m = WGS84_GEOD.inv(west, mid_lat, east, mid_lat)
+        _, _, height_m = WGS84_GEOD.inv(mid_lon, north, mid_lon, south)
+        return max(1, int(round(height_m / target_gsd_m))), max(1, int(round(width_m / target_gsd_m)))
+
+    def wgs84_bboxes_to_rio_chips(self, bboxes, rotate_mode="vrt", raster_cache:RasterCache=None,
+                                  super_window_blocks=SUPER_WINDOW_BLOCKS, out_size=None,
+                                  target_gsd_m=None, resampling=Resampling.nearest, chip_shape=None,
+                                  super_window_max_bytes=SUPER_WINDOW_MAX_BYTES):
+        """
+        Batch version of wgs84_bbox_to_rio_chip. Chip windows are grouped by the
+        block aligned super window their top left corner falls in; each group is read
+        with one read covering all its chips, snapped out to the raster's block layout,
+        and the chips are sliced out of it. Neighbouring chips then share block decodes
+        (and warps) instead of redoing them per chip. When the north aligned frame is the
+        source's own pixel grid, super windows follow the source file's blocks and are read
+        from it directly, without the warp.
+
+        Parameters
+        ----------
+        bboxes : array_like
+            N bboxes, each [[west, north], [east, south]] in WGS84 degrees
+        rotate_mode : str, optional
+            see wgs84_bbox_to_rio_chip, by default "vrt"
+        raster_cache : RasterCache, optional
+            see wgs84_bbox_to_rio_chip, by default None
+        super_window_blocks : int, optional
+            side of a super window in blocks, by default SUPER_WINDOW_BLOCKS
+        out_size, target_gsd_m, resampling : optional
+            see wgs84_bbox_to_rio_chip; resampled chips are each read on their own, at the
+            overview level GDAL picks for them, rather than coalesced
+        chip_shape : str or Tuple[int, int], optional
+            see wgs84_bboxes_to_windows; "auto" gives every chip of the batch the same shape,
+            by default None
+        super_window_max_bytes : int, optional
+            most bytes one super window read may take, all bands; super windows shrink
+            (down to one block) to fit, and groups that still don't are read chip by chip,
+            by default SUPER_WINDOW_MAX_BYTES
+
+        Yields
+        ------
+        Tuple[int, np.ndarray, dict]
+            index into bboxes, chip, profile; grouped by super window, not in input order
+        """
+        self.open_rotated(rotate_mode, raster_cache)
+        reader = self.rotated_geo_reader
+        windows = self.get_chip_windows(bboxes, chip_shape)
+        if len(windows) == 0:
+            return
+        if out_size is not None or target_gsd_m is not None:
+            for each_idx, (bbox, (col, row, width, height)) in enumerate(zip(np.asarray(bboxes).reshape(-1, 2, 2), windows)):
+                out_shape = self.get_chip_out_shape(bbox, out_size, target_gsd_m)
+                chip, profile = self.read_rotated_chip(Window(col, row, width, height), out_shape, resampling)
+                yield each_idx, chip, profile
+            return
+        if self.is_frame_source_aligned() and self.raster_memmap is not None:
+            # every in bounds window is already a view over the memory map; nothing to coalesce
+            for each_idx, (col, row, width, height) in enumerate(windows):
+                window = Window(col, row, width, height)
+                yield each_idx, self.read_rotated_window(window), self.get_chip_profile(window)
+            return
+        aligned = self.is_frame_source_aligned()
+        block_reader = self.geo_reader if aligned else reader
+        block_h, block_w = block_reader.block_shapes[0]
+        pixel_bytes = reader.count * np.dtype(reader.dtypes[0]).itemsize
+        blocks = int(math.sqrt(super_window_max_bytes / (block_h * block_w * pixel_bytes)))
+        blocks = max(1, min(super_window_blocks, blocks))
+        cell_h, cell_w = block_h * blocks, block_w * blocks
+        cols, rows, widths, heights = windows.T
+        cell_keys = np.stack((rows // cell_h, cols // cell_w), axis=1)
+        _, group_ids = np.unique(cell_keys, axis=0, return_inverse=True)
+        group_ids = group_ids.reshape(-1)
+        order = np.argsort(group_ids, kind="stable")
+        group_starts = np.flatnonzero(np.r_[True, np.diff(group_ids[order]) != 0])
+        for group_idxs in np.split(order, group_starts[1:]):
+            # union of the group's windows, snapped out to whole blocks and clipped to the raster
+            row_0 = max(0, rows[group_idxs].min() // block_h * block_h)
+            col_0 = max(0, cols[group_idxs].min() // block_w * block_w)
+            row_1 = min(block_reader.height, -(-(rows + heights)[group_idxs].max() // block_h) * block_h)
+            col_1 = min(block_reader.width, -(-(cols + widths)[group_idxs].max() // block_w) * block_w)
+            super_chip = None
+            if (row_1 > row_0 and col_1 > col_0 and
+                    (row_1 - row_0) * (col_1 - col_0) * pixel_bytes <= super_window_max_bytes):
+                super_window = Window(col_0, row_0, col_1 - col_0, row_1 - row_0)
+                super_chip = self.read_window(super_window) if aligned else reader.read(window=super_window)
+            for each_idx in group_idxs:
+                col, row, width, height = windows[each_idx]
+                window = Window(col, row, width, height)
+                if (super_chip is not None and row >= row_0 and col >= col_0 and
+                        row + height <= row_1 and col + width <= col_1):
+                    chip = super_chip[:, row - row_0:row - row_0 + height, col - col_0:col - col_0 + width]
+                else:
+                    # runs off the raster, or its group is too big; read it on its own like
+                    # wgs84_bbox_to_rio_chip
+                    chip = self.read_rotated_window(window)
+                yield int(each_idx), chip, self.get_chip_profile(window)
+
+    def open_rotated(self, rotate_mode="vrt", raster_cache:RasterCache=None):
+        """
+        Opens the north aligned frame as rotated_geo_reader; see wgs84_bbox_to_rio_chip.
+        """
+        if rotate_mode == "vrt":
+            self.open_rotated_vrt()
+        elif rotate_mode == "file":
+            if self.rotated_geo_reader is None:
+                self.save_rotate(raster_cache)
+        else:
+            raise NotImplementedError("Valid options for rotate_mode are vrt, and file")
+
+    @cached_property
+    def validity_mask(self) -> np.ndarray:
+        """
+        Low resolution boolean mask of the source's valid (not nodata) pixels, about
+        VALIDITY_DECIMATION times smaller per side. Cached per file (see
+        get_validity_mask_by_key), so the many Geotiffs tile order chipping opens on one
+        tiff only build it once.
+        """
+        stat = os.stat(self.geo_path)
+        return get_validity_mask_by_key(os.path.realpath(self.geo_path), stat.st_mtime_ns, stat.st_size)
+
+    def get_valid_footprint(self, simplify_cells=1.0):
+        """
+        WGS84 polygon around the source's valid (not nodata) pixels: validity_mask vectorized
+        with rasterio.features.shapes, grown by one mask cell so decimation never cuts off
+        valid pixels, then simplified. Unlike find_exact, nodata areas inside the raster
+        frame (strip edges, rotated wedges) are left out.
+
+        Parameters
+        ----------
+        simplify_cells : float, optional
+            simplification tolerance in mask cells, by default 1.0
+
+        Returns
+        -------
+        shapely geometry
+            (Multi)Polygon in WGS84 lon, lat; empty if the raster has no valid pixels
+        """
+        mask = self.validity_mask
+        cell_transform = self.src_affine * Affine.scale(self.geo_reader.width / mask.shape[1],
+                                                        self.geo_reader.height / mask.shape[0])
+        valid_shapes = [shape(each_shape) for each_shape, _ in
+                        rasterio.features.shapes(mask.astype("uint8"), mask=mask, transform=cell_transform)]
+        footprint = unary_union(valid_shapes)
+        if footprint.is_empty:
+            return footprint
+        cell_size = max(math.hypot(cell_transform.a, cell_transform.d),
+                        math.hypot(cell_transform.b, cell_transform.e))
+        footprint = footprint.buffer(cell_size, join_style=2).simplify(cell_size * simplify_cells)
+        if self.src_crs != "epsg:4326":
+            # vertices only; the one cell buffer absorbs edges bending between them
+            footprint = shapely_transform(get_transformer(self.src_crs, WGS84_CRS).transform, footprint)
+        return footprint
+
+    def estimate_valid_fraction(self, bboxes, rotate_mode="vrt", raster_cache:RasterCache=None,
+                                chip_shape=None, samples=VALIDITY_SAMPLES) -> np.ndarray:
+        """
+        Cheap estimate of how much of each chip would be valid data, without reading it:
+        a samples x samples grid of points in each chip window is mapped back to the source
+        and looked up in validity_mask; points off the source count as nodata (the warp
+        fills them with 255).
+
+        Parameters
+        ----------
+        bboxes : array_like
+            N bboxes, each [[west, north], [east, south]] in WGS84 degrees
+        rotate_mode, raster_cache, chip_shape : optional
+            see wgs84_bbox_to_rio_chip; the windows are the ones it would read
+        samples : int, optional
+            points per side sampled in each window, by default VALIDITY_SAMPLES
+
+        Returns
+        -------
+        np.ndarray
+            N fractions in [0, 1]
+        """
+        self.open_rotated(rotate_mode, raster_cache)
+        windows = self.get_chip_windows(bboxes, chip_shape)
+        if len(windows) == 0:
+            return np.empty(0)
+        offsets = (np.arange(samples) + 0.5) / samples
+        cols = windows[:, 0:1] + offsets[None, :] * windows[:, 2:3]
+        rows = windows[:, 1:2] + offsets[None, :] * windows[:, 3:4]
+        pix_xy = np.empty((len(windows), samples, samples, 2))
+        pix_xy[:, :, :, 0] = cols[:, None, :]
+        pix_xy[:, :, :, 1] = rows[:, :, None]
+        geo_xy = apply_affine_matrix(self.rotated_forward, pix_xy.reshape(-1, 2))
+        src_xy = apply_affine_matrix(self.src_inverse, geo_xy)
+        width, height = self.geo_reader.width, self.geo_reader.height
+        mask = self.validity_mask
+        inside = ((src_xy[:, 0] >= 0) & (src_xy[:, 0] < width) &
+                  (src_xy[:, 1] >= 0) & (src_xy[:, 1] < height))
+        mask_cols = (src_xy[inside, 0] * mask.shape[1] / width).astype("int")
+        mask_rows = (src_xy[inside, 1] * mask.shape[0] / height).astype("int")
+        valid = np.zeros(len(src_xy), dtype=bool)
+        valid[inside] = mask[mask_rows, mask_cols]
+        return valid.reshape(len(windows), -1).mean(axis=1)
+
+    def get_chip_windows(self, bboxes, chip_shape=None) -> np.ndarray:
+        if chip_shape is None:
+            return self.get_rotated_chip_windows(bboxes)
+        return self.wgs84_bboxes_to_windows(bboxes, chip_shape)
+
+    def wgs84_bboxes_to_windows(self, bboxes, chip_shape="auto") -> np.ndarray:
+        """
+        Pixel windows of wgs84 bboxes in the north aligned frame, all with one shape. Each
+        window is centred on its bbox; rounding is applied to the size once rather than to
+        each corner, so neighbouring tiles don't come out a pixel apart in size.
+
+        Parameters
+        ----------
+        bboxes : array_like
+            N bboxes, each [[west, north], [east, south]] in WGS84 degrees
+        chip_shape : str or Tuple[int, int], optional
+            (height, width) of every window, or "auto" for the rounded median size of the
+            bboxes, by default "auto"
+
+        Returns
+        -------
+        np.ndarray
+            Nx4 int array of col, row, width, height
+        """
+        bboxes = np.asarray(bboxes, dtype=float).reshape(-1, 2, 2)
+        if len(bboxes) == 0:
+            return np.empty((0, 4), dtype=int)
+        f_pixel_chip_bounds = self.wgs84_to_pix_rotated(bboxes.reshape(-1, 2)).reshape(-1, 2, 2)
+        low = f_pixel_chip_bounds.min(axis=1)
+        high = f_pixel_chip_bounds.max(axis=1)
+        if isinstance(chip_shape, str):
+            if chip_shape != "auto":
+                raise NotImplementedError("Valid options for chip_shape are auto, or (height, width)")
+            width, height = np.maximum(1, np.rint(np.median(high - low, axis=0))).astype("int")
+        else:
+            height, width = int(chip_shape[0]), int(chip_shape[1])
+        size = np.array([width, height])
+        start = np.rint((low + high) / 2 - size / 2).astype("int")
+        return np.concatenate((start, np.broadcast_to(size, start.shape)), axis=1)
+
+    def get_rotated_chip_windows(self, bboxes) -> np.ndarray:
+        """
+        Pixel windows of wgs84 bboxes in the north aligned frame.
+
+        Parameters
+        ----------
+        bboxes : array_like
+            N bboxes, each [[west, north], [east, south]] in WGS84 degrees
+
+        Returns
+        -------
+        np.ndarray
+            Nx4 int array of col, row, width, height
+        """
+        bboxes = np.asarray(bboxes, dtype=float).reshape(-1, 2, 2)
+        f_pixel_chip_bounds = self.wgs84_to_pix_rotated(bboxes.reshape(-1, 2)).reshape(-1, 2, 2)
+        pixel_chip_bounds = np.rint(f_pixel_chip_bounds).astype("int")
+        start = pixel_chip_bounds.min(axis=1)
+        size = np.abs(pixel_chip_bounds[:, 1] - pixel_chip_bounds[:, 0])
+        return np.concatenate((start, size), axis=1)
+
+    def get_chip_profile(self, window:Window, out_shape=None) -> dict:
+        profile = self.get_rotated_profile()
         win_transform = self.rotated_geo_reader.window_transform(window=window)
-        profile = self.rotated_geo_reader.profile.copy()
+        height, width = int(window.height), int(window.width)
+        if out_shape is not None:
+            out_height, out_width = out_shape
+            win_transform = win_transform * Affine.scale(width / out_width, height / out_height)
+            height, width = out_height, out_width
         profile.update({
             'height': height,
             'width': width,
             'transform': win_transform
         })
-        return chip, profile 
+        return profile
+
+    def read_into_frame(self, crs, transform:Affine, width:int, height:int, out_shape=None,
+                        resampling=Resampling.nearest):
+        """
+        Warps the source onto another raster's pixel grid (e.g. another tiff's chip window)
+        and reads it. Only the source blocks that overlap the grid are read.
+
+        Parameters
+        ----------
+        crs : rasterio.crs.CRS
+            CRS of the grid
+        transform : Affine
+            transform of the grid
+        width : int
+            width of the grid in pixels
+        height : int
+            height of the grid in pixels
+        out_shape : Tuple[int, int], optional
+            (height, width) to resample the read to, by default the grid's own
+        resampling : Resampling, optional
+            by default Resampling.nearest
+
+        Returns
+        -------
+        Tuple[np.ndarray, np.ndarray]
+            (bands, height, width) data of the bands in get_data_bands, and a (height, width)
+            boolean mask of where the source had valid data
+        """
+        if out_shape is None:
+            out_shape = (height, width)
+        data_bands = self.get_data_bands()
+        alpha_band = self.get_alpha_band()
+        # A source alpha band is warped along with the data; otherwise the warp adds one
+        # (dataset_mask doesn't pick up an added alpha on a WarpedVRT, so it is read directly)
+        valid_band = alpha_band if alpha_band is not None else self.geo_reader.count + 1
+        with WarpedVRT(self.geo_reader, crs=crs, transform=transform, width=width, height=height,
+                       add_alpha=alpha_band is None, resampling=resampling) as vrt:
+            data = vrt.read(indexes=data_bands + [valid_band],
+                            out_shape=(len(data_bands) + 1,) + tuple(out_shape), resampling=resampling)
+        return data[:-1], data[-1] > 0
+
+    def get_alpha_band(self):
+        """
+        1 based index of the source's alpha band, or None if it has none.
+        """
+        colorinterp = self.geo_reader.colorinterp
+        if rasterio.enums.ColorInterp.alpha in colorinterp:
+            return colorinterp.index(rasterio.enums.ColorInterp.alpha) + 1
+        return None
+
+    def get_data_bands(self) -> list:
+        """
+        1 based indexes of the source's bands, leaving out its alpha band.
+        """
+        alpha_band = self.get_alpha_band()
+        return [band for band in range(1, self.geo_reader.count + 1) if band != alpha_band]
+
+    def get_rotation_params(self):
+        """
+        Rotation (degrees) and padding/shift that take the source raster to its north
+        aligned frame; see rotate_raster.
+        """
+        rotation_t = self.get_rotation_north()
+        rotation = math.degrees(rotation_t)
+        rotation = -rotation
+        width = self.geo_reader.width
+        height = self.geo_reader.height
+        if(rotation < 0):
+            rotation = 360 + rotation
+        max_length = math.sqrt((width**2) + (height**2))
+        adj_w = max_length - width
+        adj_h = max_length - height
+        shift_x, shift_y = self.get_shift_for_rotation(rotation, width, height)
+        return rotation, adj_w, adj_h, shift_x, shift_y
+
+    def get_rotated_frame(self):
+        """
+        The north aligned frame chips are cut from: the same affine, width and height
+        rotate_raster writes for save_rotate.
+
+        Returns
+        -------
+        Tuple[Affine, int, int]
+            transform, width, height
+        """
+        rotation, adj_w, adj_h, shift_x, shift_y = self.get_rotation_params()
+        dst_transform = (self.src_affine * Affine.rotation(rotation) *
+                         Affine.translation(-shift_x, 0) * Affine.translation(0, -shift_y))
+        dst_width = int(self.geo_reader.width + adj_w)
+        dst_height = int(self.geo_reader.height + adj_h)
+        return dst_transform, dst_width, dst_height
+
+    def get_rotated_profile(self) -> dict:
+        """
+        Profile for writing rasters (e.g. chips) in the north aligned frame.
+        """
+        profile = self.geo_reader.meta.copy()
+        profile.update({
+            "driver": "GTiff",
+            "nodata": 255,
+            "transform": self.rotated_affine,
+            "width": self.rotated_width,
+            "height": self.rotated_height,
+        })
+        return profile
+
+    def open_rotated_vrt(self):
+        """
+        Opens the north aligned frame as a WarpedVRT over the source; nothing is written
+        to disk, and each read only resamples the pixels of its window. Reuses the already
+        open one on later calls.
+        """
+        if self.rotated_geo_reader is not None:
+            return
+        dst_transform, dst_width, dst_height = self.get_rotated_frame()
+        # src_nodata=None keeps source nodata pixels as they are (as rotate_raster does); only
+        # pixels outside the source are 255
+        self.rotated_geo_reader = WarpedVRT(self.geo_reader, crs=self.src_crs, transform=dst_transform,
+                                            width=dst_width, height=dst_height, src_nodata=None,
+                                            nodata=255, resampling=Resampling.nearest)
+        self.set_rotated_frame(dst_transform, dst_width, dst_height)
 
+    def save_rotate(self, raster_cache:RasterCache=None):
+        """
+        Writes (or reuses) the north aligned rotation of the geotiff in raster_cache, and
+        opens it as rotated_geo_reader.
+
+        Parameters
+        ----------
+        raster_cache : RasterCache, optional
+            cache to keep the rotation in, by default a RasterCache at DEFAULT_RASTER_CACHE_DIR
+        """
+        if raster_cache is None:
+            raster_cache = RasterCache()
+        rotation, adj_w, adj_h, shift_x, shift_y = self.get_rotation_params()
+        # src_nodata: rotations cached while source nodata was remapped to 255 aren't reused
+        params = {"op": "rotate_north", "rotation": rotation, "adj_width": adj_w, "adj_height": adj_h,
+                  "shift_x": -shift_x, "shift_y": shift_y, "src_nodata": None}
 
-    def save_rotate(self):
-        tiff_path = self.geo_path
-        fname = tiff_path.split('/')[-1]
-        out_path = os.path.join('/tmp', fname)
+        def create_fn(out_path):
+            self.rotate_raster(self.geo_path, out_path, rotation,
+                               adj_height=adj_h, adj_width=adj_w, shift_x=-shift_x, shift_y=shift_y)
+
+        out_path = raster_cache.get_or_create(self.geo_path, params, create_fn)
         self.rotated_path = out_path
-        if not os.path.exists(out_path):
-            rotation_t = self.get_rotation_north()
-            rotation = math.degrees(rotation_t)
-            rotation = -rotation
-            width = self.geo_reader.width
-            height = self.geo_reader.height
-            if(rotation < 0):
-                rotation = 360 + rotation
-            max_length = math.sqrt((width**2) + (height**2))
-            adj_w = max_length - width
-            adj_h = max_length - height
-            max_length = math.sqrt((width**2) + (height**2))
-            adj_w = max_length - width
-            adj_h = max_length - height
-            shift_x, shift_y = self.get_shift_for_rotation(rotation, width, height)
-            self.rotate_raster(tiff_path, out_path, rotation,
-                                adj_height=adj_h, adj_width=adj_w, shift_x=-shift_x, shift_y=shift_y)
+        if self.rotated_geo_reader is not None:
+            self.rotated_geo_reader.close()
         rotated_data = rasterio.open(out_path)
         self.rotated_geo_reader = rotated_data
-        self.rotated_affine = rotated_data.transform
-        self.rotated_width = rotated_data.width
-        self.rotated_height = rotated_data.height
+        self.set_rotated_frame(rotated_data.transform, rotated_data.width, rotated_data.height)
         return         
+
+    def set_rotated_frame(self, transform:Affine, width:int, height:int):
+        self.rotated_affine = transform
+        self.rotated_forward, self.rotated_inverse = get_affine_matrices(transform)
+        self.rotated_width = width
+        self.rotated_height = height
     
 
-    def rotate_raster(self, in_file,out_file, angle, shift_x=0, shift_y=0,adj_width=0, adj_height=0):
-
-
-        with rasterio.open(in_file) as src:
-
-            # Get the old transform and crs
-            src_transform = src.transform 
-            crs = src.crs
-
-            # Affine transformations for rotation and translation
-            rotate = Affine.rotation(angle)
-            trans_x = Affine.translation(shift_x,0)
-            trans_y = Affine.translation(0, -shift_y)
-
-            # Combine affine transformations
-            dst_transform = src_transform * rotate * trans_x * trans_y
-
-            # Get band data
-            band = np.array(src.read(1))
-
-            # Get the new shape
-            y,x = band.shape
-            dst_height = y + adj_height
-            dst_width = x + adj_width
-
-            # set properties for output
-            dst_kwargs = src.meta.copy()
-            dst_kwargs.update(
-                {
-                    "transform": dst_transform,
-                    "height": dst_height,
-                    "width": dst_width,
-                    "nodata": 255,
-                }
-            )
-
-            # write to disk
-            with rasterio.open(out_file, "w", **dst_kwargs) as dst:
-                # reproject to new CRS
-
-                reproject(source=band,
-                            destination=rasterio.band(dst, 1),
-                            src_transform=src_transform,
-                            src_crs=crs,
-                            dst_transform=dst_transform,
-                            dst_crs=crs,
-                            resampling=Resampling.nearest)
+    def rotate_raster(self, in_file,out_file, angle, shift_x=0, shift_y=0,adj_width=0, adj_height=0,
+                      warp_mem_limit=ROTATE_WARP_MEM_LIMIT, num_threads=1):
+        rotate_raster(in_file, out_file, angle, shift_x=shift_x, shift_y=shift_y,
+                      adj_width=adj_width, adj_height=adj_height,
+                      warp_mem_limit=warp_mem_limit, num_threads=num_threads)
 
     def get_rotation_north(self):
         sx = np.linalg.norm(np.array(self.src_affine.column_vectors[0]), ord=2)
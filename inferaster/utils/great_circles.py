@@ -1,6 +1,11 @@
+import numpy as np
+from pyproj import Geod
 from inferaster.utils.geo_shapes import WgsPoint
 from geopy.distance import geodesic
 
+# Same ellipsoid and Karney solver geopy's geodesic uses, but takes whole arrays at once
+WGS84_GEOD = Geod(ellps="WGS84")
+
 def move_along_parallel(pt, m) -> WgsPoint:
     # -m is west, +m is east
     parallel_pm = WgsPoint(0, pt.lat)
@@ -23,3 +28,10 @@ def move_along_meridian(pt, m) -> WgsPoint:
     dist = geodesic(meters=m)
     dst = dist.destination(pt, bearing=0)
     return WgsPoint(dst.longitude, dst.latitude)
+
+def m_per_deg_along_parallel(lat) -> np.ndarray:
+    # Geodesic length of 1 degree of longitude at each latitude, like move_along_parallel uses
+    lat = np.asarray(lat, dtype=np.float64)
+    zeros = np.zeros_like(lat)
+    _, _, dist = WGS84_GEOD.inv(zeros, lat, zeros + 1.0, lat)
+    return np.asarray(dist)
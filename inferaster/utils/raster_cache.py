@@ -0,0 +1,158 @@
+import hashlib
+import json
+import os
+import tempfile
+from typing import Callable
+
+DEFAULT_RASTER_CACHE_DIR = os.path.join(tempfile.gettempdir(), "inferaster_raster_cache")
+DEFAULT_RASTER_CACHE_MAX_BYTES = 20 * 1024**3
+
+
+class RasterCache():
+    """
+    Directory of derived rasters (e.g. north aligned rotations), keyed by the content they
+    were made from: the source's real path, mtime and size plus the parameters of the
+    transform. A changed source or changed parameters give a new key, so stale outputs are
+    never reused. Files are evicted least recently used first once the directory grows past
+    max_bytes; a file's mtime is bumped every time it is used, and serves as its LRU stamp.
+    """
+    SUFFIX = ".tif"
+
+    def __init__(self, cache_dir:str=DEFAULT_RASTER_CACHE_DIR,
+                 max_bytes:int=DEFAULT_RASTER_CACHE_MAX_BYTES) -> None:
+        """
+
+        Parameters
+        ----------
+        cache_dir : str, optional
+            Directory to keep cached rasters in, created if needed, by default DEFAULT_RASTER_CACHE_DIR
+        max_bytes : int, optional
+            Byte budget for the directory, by default DEFAULT_RASTER_CACHE_MAX_BYTES
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def get_key(self, src_path:str, params:dict) -> str:
+        """
+        Key for the raster made from src_path with params.
+
+        Parameters
+        ----------
+        src_path : str
+            Source raster path
+        params : dict
+            JSON serializable parameters of the transform (e.g. rotation and shifts)
+
+        Returns
+        -------
+        str
+            sha1 hex digest
+        """
+        stat = os.stat(src_path)
+        key_src = json.dumps({
+            "path": os.path.realpath(src_path),
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "params": params,
+        }, sort_keys=True)
+        return hashlib.sha1(key_src.encode("utf-8")).hexdigest()
+
+    def get_path(self, key:str) -> str:
+        return os.path.join(self.cache_dir, key + self.SUFFIX)
+
+    def get_or_create(self, src_path:str, params:dict, create_fn:Callable[[str], None]) -> str:
+        """
+        Path of the cached raster for src_path and params, calling create_fn(out_path) to
+        make it on a miss. create_fn writes to a per process temp path that is moved into
+        place when done, so concurrent processes never see a partial file.
+
+        Parameters
+        ----------
+        src_path : str
+            Source raster path
+        params : dict
+            JSON serializable parameters of the transform
+        create_fn : Callable[[str], None]
+            Writes the derived raster to the path it is given
+
+        Returns
+        -------
+        str
+            Path of the cached raster
+        """
+        key = self.get_key(src_path, params)
+        out_path = self.get_path(key)
+        if os.path.exists(out_path):
+            try:
+                os.utime(out_path)
+                return out_path
+            except FileNotFoundError:
+                # evicted by another process in between, make it again
+                pass
+        tmp_path = "{}.{}.tmp".format(out_path, os.getpid())
+        try:
+            create_fn(tmp_path)
+            os.replace(tmp_path, out_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        self.evict(keep=out_path)
+        return out_path
+
+    def get_size(self) -> int:
+        return sum(size for _, _, size in self.list_entries())
+
+    def list_entries(self):
+        """
+        Cached rasters as (path, mtime, size), least recently used first. In progress
+        temp files aren't included.
+        """
+        entries = []
+        for each_name in os.listdir(self.cache_dir):
+            if not each_name.endswith(self.SUFFIX):
+                continue
+            each_path = os.path.join(self.cache_dir, each_name)
+            try:
+                stat = os.stat(each_path)
+            except FileNotFoundError:
+                continue
+            entries.append((each_path, stat.st_mtime, stat.st_size))
+        entries.sort(key=lambda entry: entry[1])
+        return entries
+
+    def evict(self, keep:str=None) -> int:
+        """
+        Removes least recently used rasters until the directory fits in max_bytes.
+
+        Parameters
+        ----------
+        keep : str, optional
+            Path never to remove (e.g. the raster just made), by default None
+
+        Returns
+        -------
+        int
+            Number of bytes freed
+        """
+        entries = self.list_entries()
+        total = sum(size for _, _, size in entries)
+        freed = 0
+        for each_path, _, size in entries:
+            if total - freed <= self.max_bytes:
+                break
+            if each_path == keep:
+                continue
+            try:
+                os.remove(each_path)
+                freed += size
+            except FileNotFoundError:
+                pass
+        return freed
+
+    def clear(self) -> None:
+        for each_path, _, _ in self.list_entries():
+            try:
+                os.remove(each_path)
+            except FileNotFoundError:
+                pass
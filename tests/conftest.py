@@ -0,0 +1,66 @@
+import json
+import os
+
+import numpy as np
+import pytest
+import rasterio
+import yaml
+from affine import Affine
+
+from inferaster.utils.parse_config import parse_config
+
+# 1e-5 degree pixels, about 1.1 m at the equator
+PIXEL_DEG = 1e-5
+
+
+def write_tiff(path, west, north, width, height, count=3, nodata=None, data=None, seed=0):
+    """
+    Writes a north aligned WGS84 uint8 geotiff; data defaults to random values in 1..249.
+    """
+    if data is None:
+        data = np.random.default_rng(seed).integers(1, 250, (count, height, width)).astype("uint8")
+    profile = dict(driver="GTiff", width=width, height=height, count=count, dtype="uint8",
+                   crs="EPSG:4326", transform=Affine(PIXEL_DEG, 0, west, 0, -PIXEL_DEG, north),
+                   nodata=nodata)
+    with rasterio.open(path, "w", **profile) as dst:
+        dst.write(data)
+
+
+@pytest.fixture
+def chip_dataset(tmp_path):
+    """
+    Empty data directory laid out the way BaseChipper expects; returns (tiff_dir, make_config),
+    where make_config(chip_dir) parses a 200 m EquiviTiles config for it.
+    """
+    tiff_dir = tmp_path / "tiffs_to_chip"
+    tiff_dir.mkdir()
+    with open(tmp_path / "metadata.json", "w") as metadatafp:
+        json.dump({"collections": {}, "paths": {}}, metadatafp)
+
+    def make_config(chip_dir="chipped", **extra):
+        config = {
+            "dataset": "test",
+            "bounding_box": {"nw_point": {"latitude": 0.02, "longitude": -0.02},
+                             "se_point": {"latitude": -0.02, "longitude": 0.02}},
+            "datapath": str(tmp_path),
+            "full_tiff_dir": "tiffs_to_chip",
+            "chip_dir": chip_dir,
+            "tiling_method": "EquiviTiles",
+            "chip_size_m": 200,
+            "raster_cache_dir": str(tmp_path / "raster_cache"),
+        }
+        config.update(extra)
+        config_path = tmp_path / "{}.yaml".format(chip_dir)
+        with open(config_path, "w") as configfp:
+            yaml.dump(config, configfp)
+        return parse_config(str(config_path))
+
+    return tiff_dir, make_config
+
+
+def list_chips(chips_path):
+    chips = set()
+    for root, _, files in os.walk(chips_path):
+        chips.update(os.path.relpath(os.path.join(root, each_file), chips_path)
+                     for each_file in files if each_file.endswith(".tiff"))
+    return chips
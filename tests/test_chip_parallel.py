@@ -0,0 +1,30 @@
+import os
+
+from conftest import list_chips, write_tiff
+from inferaster.chipping.chipper import BaseChipper
+
+
+class CrashingChipper(BaseChipper):
+    """
+    Kills its worker process outright (no exception) when it gets to crash.tiff.
+    """
+    def chip_one_tiff(self, tiff_row) -> int:
+        if tiff_row["img_name"] == "crash.tiff":
+            os._exit(1)
+        return super().chip_one_tiff(tiff_row)
+
+
+def test_crashed_worker_does_not_lose_other_tiffs(chip_dataset):
+    tiff_dir, make_config = chip_dataset
+    for i in range(6):
+        write_tiff(tiff_dir / "tiff_{}.tiff".format(i), -0.015 + 0.005 * i, 0.01, 600, 600, seed=i)
+    write_tiff(tiff_dir / "crash.tiff", -0.01, -0.002, 600, 600)
+
+    serial = BaseChipper(make_config("serial"))
+    serial.chip(order="tiff")
+    expected = {chip for chip in list_chips(serial.chips_path) if not chip.endswith("crash.tiff")}
+    assert expected
+
+    parallel = CrashingChipper(make_config("parallel"))
+    parallel.chip(order="tiff", workers=2)
+    assert list_chips(parallel.chips_path) == expected
@@ -0,0 +1,54 @@
+import os
+
+import numpy as np
+import pytest
+import rasterio
+from affine import Affine
+
+from conftest import PIXEL_DEG, list_chips
+from inferaster.chipping.chipper import BaseChipper
+
+
+def write_rotated_tiff(path, data, nodata):
+    transform = Affine(PIXEL_DEG, 0, 0.0, 0, -PIXEL_DEG, 0.005) * Affine.rotation(15)
+    profile = dict(driver="GTiff", width=data.shape[2], height=data.shape[1], count=data.shape[0],
+                   dtype="uint8", crs="EPSG:4326", transform=transform, nodata=nodata)
+    with rasterio.open(path, "w", **profile) as dst:
+        dst.write(data)
+
+
+def read_chips(chips_path):
+    chips = {}
+    for each_chip in list_chips(chips_path):
+        with rasterio.open(os.path.join(chips_path, each_chip)) as src:
+            chips[each_chip] = src.read()
+    return chips
+
+
+@pytest.mark.parametrize("rotate_mode", ["vrt", "file"])
+def test_source_nodata_is_kept_in_chips(chip_dataset, rotate_mode):
+    """
+    Source nodata pixels go into chips as they are, as the original rotation wrote them;
+    only pixels outside the source become 255, so a nodata value doesn't change the chips.
+    """
+    tiff_dir, make_config = chip_dataset
+    data = np.random.default_rng(0).integers(1, 250, (2, 700, 900)).astype("uint8")
+    # thin nodata stripes, through many chips but well under the 150 pixel 255 limit if remapped
+    data[:, :, 300:310] = 0
+    data[:, 400:405, :] = 0
+
+    write_rotated_tiff(tiff_dir / "scene.tiff", data, nodata=None)
+    plain = BaseChipper(make_config("plain", rotate_mode=rotate_mode))
+    plain.chip()
+    expected = read_chips(plain.chips_path)
+    assert expected
+    assert any((chip == 0).any() for chip in expected.values())
+
+    os.remove(tiff_dir / "scene.tiff")
+    write_rotated_tiff(tiff_dir / "scene.tiff", data, nodata=0)
+    with_nodata = BaseChipper(make_config("with_nodata", rotate_mode=rotate_mode))
+    with_nodata.chip()
+    chips = read_chips(with_nodata.chips_path)
+    assert chips.keys() == expected.keys()
+    for each_chip, chip in chips.items():
+        np.testing.assert_array_equal(chip, expected[each_chip])